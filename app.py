@@ -1,6 +1,6 @@
 import sys
 
-from models import Parser
+from models import InstanceCache
 from models.initial_solution import InitialSolution
 import os
 from models.genetic_solver import GeneticSolver
@@ -15,8 +15,7 @@ def run_instances(output_dir='output'):
     for file in directory:
         if file.endswith('.txt'):
             print(f'Computing ./input/{file}')
-            parser = Parser(f'./input/{file}')
-            instance = parser.parse()
+            instance = InstanceCache(f'./input/{file}').load()
             initial_solution = InitialSolution.generate_initial_solution(instance)
             genetic_solver = GeneticSolver(initial_solution=initial_solution, instance=instance)
             solution = genetic_solver.solve()
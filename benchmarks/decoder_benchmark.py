@@ -0,0 +1,112 @@
+import argparse
+import glob
+import os
+import random
+import time
+
+import numpy as np
+
+from models import InstanceCache
+from models.batch_decoder import BatchDecoder
+from models.decoder import Decoder
+from models.solution import Solution
+
+INPUT_INSTANCES_DIR = 'input'
+
+
+def legacy_decode(order, unsigned_libs, data):
+    """The rebuild loop `Tweaks` used before `Decoder`, kept as the baseline."""
+    new_solution = Solution(list(order), list(unsigned_libs), {}, set())
+
+    curr_time = 0
+    new_scanned_books = set()
+    new_scanned_books_per_library = {}
+    new_signed_libraries = []
+
+    for lib_id in new_solution.signed_libraries:
+        library = data.libs[lib_id]
+
+        if curr_time + library.signup_days >= data.num_days - 1:
+            new_solution.unsigned_libraries.append(lib_id)
+            continue
+
+        time_left = data.num_days - (curr_time + library.signup_days)
+        max_books_scanned = time_left * library.books_per_day
+
+        available_books = sorted(
+            {book.id for book in library.books} - new_scanned_books,
+            key=lambda b: -data.scores[b]
+        )[:max_books_scanned]
+
+        if available_books:
+            new_signed_libraries.append(lib_id)
+            new_scanned_books_per_library[lib_id] = available_books
+            new_scanned_books.update(available_books)
+            curr_time += library.signup_days
+        else:
+            new_solution.unsigned_libraries.append(lib_id)
+
+    new_solution.signed_libraries = new_signed_libraries
+    new_solution.scanned_books_per_library = new_scanned_books_per_library
+    new_solution.scanned_books = new_scanned_books
+    new_solution.calculate_fitness_score(data.scores)
+    return new_solution
+
+
+def decodes_per_second(decode, orders, time_budget):
+    decodes = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < time_budget:
+        decode(orders[decodes % len(orders)])
+        decodes += 1
+    return decodes / (time.perf_counter() - start)
+
+
+def batch_decodes_per_second(batch_decoder, orders, time_budget):
+    orders = np.array(orders)
+    decodes = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < time_budget:
+        batch_decoder.evaluate(orders)
+        decodes += len(orders)
+    return decodes / (time.perf_counter() - start)
+
+
+def main(instance_paths, time_budget: float, seed: int) -> None:
+    print(f"{'Instance':<40} {'legacy (dec/s)':>15} {'Decoder (dec/s)':>16} {'Speedup':>8} "
+          f"{'BatchDecoder (dec/s)':>21} {'Speedup':>8}")
+    print("-" * 113)
+    for instance_path in instance_paths:
+        instance = InstanceCache(instance_path).load()
+        decoder = Decoder.for_instance(instance)
+
+        # Signup-time ordered libraries with random perturbations, like the orders the GA decodes
+        rng = random.Random(seed)
+        base = sorted(range(instance.num_libs), key=lambda lib: instance.lib_signup_days[lib])
+        orders = []
+        for _ in range(16):
+            order = base[:]
+            for _ in range(max(1, len(order) // 20)):
+                i, j = rng.randrange(len(order)), rng.randrange(len(order))
+                order[i], order[j] = order[j], order[i]
+            orders.append(order)
+
+        # Build the lazy Library objects before timing the legacy loop
+        instance.libs[:]
+        legacy = decodes_per_second(lambda order: legacy_decode(order, [], instance), orders, time_budget)
+        engine = decodes_per_second(lambda order: decoder.decode(order, []), orders, time_budget)
+        batch = batch_decodes_per_second(BatchDecoder(instance), orders, time_budget)
+
+        instance_name = os.path.basename(instance_path)
+        print(f"{instance_name:<40} {legacy:>15.1f} {engine:>16.1f} {engine / legacy:>7.1f}x "
+              f"{batch:>21.1f} {batch / legacy:>7.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Decodes per second of the legacy rebuild loop, Decoder and BatchDecoder.')
+    parser.add_argument('instances', nargs='*', help='Input files (default: every file in input/)')
+    parser.add_argument('-t', '--time-budget', type=float, default=2.0, help='Seconds per decoder and instance')
+    parser.add_argument('-s', '--seed', type=int, default=0)
+
+    args = parser.parse_args()
+    main(args.instances or sorted(glob.glob(f'{INPUT_INSTANCES_DIR}/*.txt')), args.time_budget, args.seed)
@@ -0,0 +1,41 @@
+import argparse
+import glob
+import os
+import time
+
+from models import Parser
+
+INPUT_INSTANCES_DIR = 'input'
+
+
+def time_call(func, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(num_files: int, repeats: int) -> None:
+    instance_paths = sorted(glob.glob(f'{INPUT_INSTANCES_DIR}/*.txt'), key=os.path.getsize, reverse=True)
+
+    print(f"{'Instance':<40} {'Size (MB)':>10} {'parse (s)':>10} {'parse_fast (s)':>15} {'Speedup':>8}")
+    print("-" * 87)
+    for instance_path in instance_paths[:num_files]:
+        parser = Parser(instance_path)
+        slow = time_call(parser.parse, repeats)
+        fast = time_call(parser.parse_fast, repeats)
+
+        instance_name = os.path.basename(instance_path)
+        size_mb = os.path.getsize(instance_path) / 2 ** 20
+        print(f"{instance_name:<40} {size_mb:>10.2f} {slow:>10.3f} {fast:>15.3f} {slow / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare Parser.parse with Parser.parse_fast on the largest inputs.')
+    parser.add_argument('-n', '--num-files', type=int, default=5)
+    parser.add_argument('-r', '--repeats', type=int, default=3)
+
+    args = parser.parse_args()
+    main(args.num_files, args.repeats)
@@ -0,0 +1,65 @@
+import argparse
+import random
+import time
+
+from models.selection_strategies import SelectionStrategies, SelectionTables
+
+
+class Individual:
+    def __init__(self, fitness_score):
+        self.fitness_score = fitness_score
+
+
+def selections_per_second(select, time_budget):
+    selections = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < time_budget:
+        select()
+        selections += 1
+    return selections / (time.perf_counter() - start)
+
+
+def same_picks(population, seed, num_picks=1000):
+    """Whether both implementations select the same individuals for the same random state."""
+    random.seed(seed)
+    expected = []
+    for _ in range(num_picks):
+        expected.append(SelectionStrategies.choose_selection_method()(population))
+
+    random.seed(seed)
+    tables = SelectionTables(population)
+    return all(tables.choose_selection_method()() is individual for individual in expected)
+
+
+def main(population_sizes, time_budget: float, seed: int) -> None:
+    print(f"{'Population':>10} {'strategies (sel/s)':>19} {'tables (sel/s)':>15} {'Speedup':>8} {'Same picks':>11}")
+    print("-" * 67)
+    for population_size in population_sizes:
+        rng = random.Random(seed)
+        population = [Individual(rng.randint(0, 10 ** 7)) for _ in range(population_size)]
+
+        strategies = selections_per_second(lambda: SelectionStrategies.choose_selection_method()(population),
+                                           time_budget)
+
+        # The tables are rebuilt every population_size selections, like once per generation
+        state = {'tables': None, 'selections': 0}
+
+        def select_with_tables():
+            if state['selections'] % population_size == 0:
+                state['tables'] = SelectionTables(population)
+            state['selections'] += 1
+            return state['tables'].choose_selection_method()()
+
+        tables = selections_per_second(select_with_tables, time_budget)
+        print(f"{population_size:>10} {strategies:>19.0f} {tables:>15.0f} {tables / strategies:>7.1f}x "
+              f"{str(same_picks(population, seed)):>11}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Selections per second of SelectionStrategies and SelectionTables.')
+    parser.add_argument('sizes', nargs='*', type=int, default=[100, 1000, 10000], help='Population sizes')
+    parser.add_argument('-t', '--time-budget', type=float, default=2.0, help='Seconds per implementation and size')
+    parser.add_argument('-s', '--seed', type=int, default=0)
+
+    args = parser.parse_args()
+    main(args.sizes, args.time_budget, args.seed)
@@ -0,0 +1,54 @@
+import argparse
+import glob
+import os
+import time
+
+from models import InstanceCache
+from models.initial_solution import InitialSolution
+
+INPUT_INSTANCES_DIR = 'input'
+
+
+def timed(construct):
+    start = time.perf_counter()
+    solution = construct()
+    return solution, time.perf_counter() - start
+
+
+def same_solution(a, b):
+    return a.signed_libraries == b.signed_libraries and \
+        a.scanned_books_per_library == b.scanned_books_per_library and \
+        a.fitness_score == b.fitness_score
+
+
+def main(instance_paths, alpha: float, beta: float, lazy_only: bool) -> None:
+    print(f"{'Instance':<40} {'Score':>10} {'eager (s)':>10} {'lazy (s)':>9} {'Speedup':>8} {'Same output':>12}")
+    print("-" * 94)
+    for instance_path in instance_paths:
+        instance = InstanceCache(instance_path).load()
+        # Build the lazy Library objects before timing the eager version
+        instance.libs[:]
+
+        lazy, lazy_sec = timed(
+            lambda: InitialSolution.generate_initial_solution_weighted_efficiency(instance, alpha, beta))
+        instance_name = os.path.basename(instance_path)
+        if lazy_only:
+            print(f"{instance_name:<40} {lazy.fitness_score:>10} {'-':>10} {lazy_sec:>9.2f} {'-':>8} {'-':>12}")
+            continue
+
+        eager, eager_sec = timed(
+            lambda: InitialSolution.generate_initial_solution_weighted_efficiency_eager(instance, alpha, beta))
+        print(f"{instance_name:<40} {lazy.fitness_score:>10} {eager_sec:>10.2f} {lazy_sec:>9.2f} "
+              f"{eager_sec / lazy_sec:>7.1f}x {str(same_solution(eager, lazy)):>12}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Seconds per weighted efficiency construction, eager and lazy.')
+    parser.add_argument('instances', nargs='*', help='Input files (default: every file in input/)')
+    parser.add_argument('-a', '--alpha', type=float, default=1.0)
+    parser.add_argument('-b', '--beta', type=float, default=0.1)
+    parser.add_argument('--lazy-only', action='store_true',
+                        help='Skip the eager version, which takes minutes on the large instances')
+
+    args = parser.parse_args()
+    main(args.instances or sorted(glob.glob(f'{INPUT_INSTANCES_DIR}/*.txt')), args.alpha, args.beta, args.lazy_only)
@@ -4,38 +4,134 @@ import os
 
 from models.initial_solution import InitialSolution
 from models.genetic_solver import GeneticSolver
-from models import Parser
+from models.island_model import IslandModel
+from models.pipeline_runner import PipelineRunner
+from models import InstanceCache
 
 INPUT_INSTANCES_DIR = 'input'
 OUTPUT_INSTANCES_DIR = 'output'
+# Snapshots of unfinished runs; a rerun of the same version with --resume continues them
+CHECKPOINTS_DIR = 'checkpoints'
+CHECKPOINT_INTERVAL_SEC = 60
+# Best-so-far solutions are written to the output file while the GA runs, and their
+# (elapsed seconds, score) to a trace file here
+TRACES_DIR = 'traces'
+STREAM_INTERVAL_SEC = 5
+# Per-generation timings and counters, written with --telemetry
+TELEMETRY_DIR = 'telemetry'
 
 MINUTES_TO_RUN = 10
 
-def main(version: str) -> None:
+def construct(instance, workers: int = 0, portfolio: bool = False):
+    """Initial solution and the other solutions that seed the GA population."""
+    if portfolio:
+        return InitialSolution.generate_initial_solution_portfolio(instance)
+    return InitialSolution.generate_initial_solution(instance, workers=workers), []
+
+
+def main(version: str, islands: int = 0, topology: str = 'ring', workers: int = 0, telemetry: bool = False,
+         pipeline: bool = False, portfolio: bool = False, resume: bool = False, adaptive_tweaks: bool = False) -> None:
     output_sub_dir = os.path.join(OUTPUT_INSTANCES_DIR, version)
     os.makedirs(output_sub_dir, exist_ok=True)
 
     instance_paths = glob.glob(f'{INPUT_INSTANCES_DIR}/*.txt')
 
     for instance_path in instance_paths:
-        parser = Parser(instance_path)
-        instance = parser.parse()
-        initial_solution = InitialSolution.generate_initial_solution(instance)
-        genetic_solver = GeneticSolver(initial_solution=initial_solution, 
-                                       instance=instance,
-                                       time_limit_sec=MINUTES_TO_RUN * 60)
+        instance_name = os.path.basename(instance_path)
+        output_file = os.path.join(output_sub_dir, instance_name)
+        instance = InstanceCache(instance_path).load()
+        if pipeline:
+            # One budget for constructing, the GA and polishing, see `PipelineRunner`
+            runner = PipelineRunner(instance, MINUTES_TO_RUN * 60,
+                                    offspring_workers=workers,
+                                    output_path=output_file,
+                                    trace_path=os.path.join(TRACES_DIR, version, f'{instance_name}.csv'),
+                                    stream_interval_sec=STREAM_INTERVAL_SEC,
+                                    adaptive_tweaks=adaptive_tweaks)
+            solution = runner.run()
+            print(instance_name, solution.fitness_score, f'version: {version}')
+            print(runner.report())
+            solution.export(output_file)
+            continue
+
+        if islands > 0:
+            initial_solution, seed_solutions = construct(instance, workers, portfolio)
+            genetic_solver = IslandModel(initial_solution=initial_solution,
+                                         instance=instance,
+                                         num_islands=islands,
+                                         topology=topology,
+                                         time_limit_sec=MINUTES_TO_RUN * 60,
+                                         seed_solutions=seed_solutions,
+                                         adaptive_tweaks=adaptive_tweaks)
+        else:
+            genetic_solver = GeneticSolver(initial_solution=None,
+                                           instance=instance,
+                                           time_limit_sec=MINUTES_TO_RUN * 60,
+                                           offspring_workers=workers,
+                                           checkpoint_path=os.path.join(CHECKPOINTS_DIR, version,
+                                                                        f'{os.path.basename(instance_path)}.pkl'),
+                                           checkpoint_interval_sec=CHECKPOINT_INTERVAL_SEC,
+                                           resume=resume,
+                                           output_path=output_file,
+                                           trace_path=os.path.join(TRACES_DIR, version, f'{instance_name}.csv'),
+                                           stream_interval_sec=STREAM_INTERVAL_SEC,
+                                           adaptive_tweaks=adaptive_tweaks,
+                                           telemetry_path=os.path.join(TELEMETRY_DIR, version, f'{instance_name}.jsonl')
+                                           if telemetry else None)
+            # A resumed run takes its population from the snapshot and needs no initial solution
+            if genetic_solver.load_checkpoint() is None:
+                genetic_solver.initial_solution, genetic_solver.seed_solutions = \
+                    construct(instance, workers, portfolio)
         solution = genetic_solver.solve()
         score = solution.fitness_score
 
-        instance_name = os.path.basename(instance_path)
         print(instance_name, score, f'version: {version}')
-        output_file = os.path.join(output_sub_dir, instance_name)
+        if getattr(genetic_solver, 'fitness_cache', None) is not None:
+            print(instance_name, f'fitness cache {genetic_solver.fitness_cache}')
+        if getattr(genetic_solver, 'upper_bound', None) is not None:
+            print(instance_name, f'upper bound {genetic_solver.upper_bound}, gap {genetic_solver.gap:.4%}')
+        if getattr(genetic_solver, 'operator_scheduler', None) is not None:
+            print(genetic_solver.operator_scheduler)
         solution.export(output_file)
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('-v', '--version', type=str, required=True)
+    parser.add_argument('-i', '--islands', type=int, default=0,
+                        help='Run this many GA populations in parallel processes (0: a single population)')
+    parser.add_argument('-t', '--topology', choices=IslandModel.TOPOLOGIES, default='ring',
+                        help='Migration topology of the islands')
+    parser.add_argument('-w', '--workers', type=int, default=0,
+                        help='Worker processes that tune the initial solution and create the offspring of each '
+                             'generation (0: none); with --islands they only tune the initial solution')
+    parser.add_argument('-p', '--pipeline', action='store_true',
+                        help='Split the time budget between constructing, the GA and polishing, instead of '
+                             'constructing before the GA\'s own time limit')
+    parser.add_argument('--portfolio', action='store_true',
+                        help='Run the initial solution constructors at the same time in worker processes and seed '
+                             'the GA population with their best results')
+    parser.add_argument('--adaptive-tweaks', action='store_true',
+                        help='Pick tweaks by their recent fitness gain per CPU-second (see OperatorScheduler) instead '
+                             'of the fixed Tweaks.WEIGHTS')
+    parser.add_argument('--telemetry', action='store_true',
+                        help=f'Write per-generation timings and counters to {TELEMETRY_DIR}/<version>/<instance>.jsonl')
+    parser.add_argument('--resume', action='store_true',
+                        help=f'Continue interrupted runs of this version from their snapshots in '
+                             f'{CHECKPOINTS_DIR}/<version>, if the GA settings did not change')
 
     args = parser.parse_args()
-    main(args.version)
+    # Options the island and pipeline runs do not support, rejected instead of silently ignored
+    if args.pipeline:
+        unsupported = {'--islands': args.islands > 0, '--portfolio': args.portfolio, '--resume': args.resume,
+                       '--telemetry': args.telemetry}
+        mode = '--pipeline'
+    else:
+        unsupported = {'--resume': args.resume, '--telemetry': args.telemetry} if args.islands > 0 else {}
+        mode = '--islands'
+    options = [option for option, used in unsupported.items() if used]
+    if options:
+        parser.error(f"{mode} cannot be combined with {', '.join(options)}")
+
+    main(args.version, args.islands, args.topology, args.workers, args.telemetry, args.pipeline, args.portfolio,
+         args.resume, args.adaptive_tweaks)
@@ -1,7 +1,9 @@
 from .parser import Parser
+from .instance_cache import InstanceCache
 from .instance_data import InstanceData
 from .library import Library
 from .solver import Solver
 from .solution import Solution
+from .fitness_cache import FitnessCache
 from .book import Book
 
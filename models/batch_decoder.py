@@ -0,0 +1,93 @@
+import numpy as np
+
+
+class BatchDecoder:
+    """
+    Scores many library orders at once without building `Solution`s.
+
+    `evaluate` applies the `Decoder` rules to every row of a 2-D array of library
+    orders in lockstep: step j signs up library `orders[:, j]` of every individual,
+    scans its best unscanned books with NumPy over the instance's CSR arrays, and only
+    individuals that can still sign up libraries are touched. The scores and signed
+    library counts are the ones `Decoder.decode` would produce for the same orders.
+    """
+    # Upper bound for the scanned-books masks of one chunk of individuals, in bytes
+    MAX_MASK_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, data):
+        self.num_days = data.num_days
+        self.num_books = data.num_books
+        self.score_array = data.score_array.astype(np.int64)
+        self.signup_days = data.lib_signup_days.astype(np.int64)
+        self.books_per_day = data.lib_books_per_day.astype(np.int64)
+        self.lib_book_offsets = data.lib_book_offsets.astype(np.int64)
+        self.lib_book_ids = data.lib_book_ids.astype(np.int64)
+        self.min_signup_days = int(self.signup_days.min()) if len(self.signup_days) else 0
+
+    def evaluate(self, orders):
+        """
+        Returns `(scores, signed_counts)` for a 2-D array of library orders, one order per
+        row. Rows shorter than the array are padded with -1.
+        """
+        orders = np.asarray(orders, dtype=np.int64)
+        if orders.ndim != 2:
+            raise ValueError(f"Expected a 2-D array of library orders, got {orders.ndim} dimensions")
+
+        scores = np.zeros(len(orders), dtype=np.int64)
+        signed_counts = np.zeros(len(orders), dtype=np.int64)
+        chunk_size = max(1, BatchDecoder.MAX_MASK_BYTES // max(1, self.num_books))
+        for start in range(0, len(orders), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            scores[chunk], signed_counts[chunk] = self._evaluate_chunk(orders[chunk])
+        return scores, signed_counts
+
+    def _evaluate_chunk(self, orders):
+        num_individuals, length = orders.shape
+        num_books = self.num_books
+        offsets = self.lib_book_offsets
+
+        scanned = np.zeros(num_individuals * num_books, dtype=np.bool_)
+        curr_time = np.zeros(num_individuals, dtype=np.int64)
+        scores = np.zeros(num_individuals, dtype=np.int64)
+        signed_counts = np.zeros(num_individuals, dtype=np.int64)
+
+        for step in range(length):
+            # Nobody can sign up another library
+            if curr_time.min() + self.min_signup_days >= self.num_days:
+                break
+
+            libs = orders[:, step]
+            lib_ids = np.where(libs >= 0, libs, 0)
+            time_left = self.num_days - (curr_time + self.signup_days[lib_ids])
+            capacity = time_left * self.books_per_day[lib_ids]
+            active = np.flatnonzero((libs >= 0) & (time_left > 0) & (capacity > 0))
+            if not len(active):
+                continue
+
+            # The books of every active individual's library, concatenated
+            lib_ids = lib_ids[active]
+            starts = offsets[lib_ids]
+            sizes = offsets[lib_ids + 1] - starts
+            segment_starts = np.cumsum(sizes) - sizes
+            owners = np.repeat(np.arange(len(active)), sizes)
+            books = self.lib_book_ids[np.arange(sizes.sum()) + np.repeat(starts - segment_starts, sizes)]
+            cells = active[owners] * num_books + books
+
+            # Take the first `capacity` unscanned books of each library
+            free = ~scanned[cells]
+            free_seen = np.cumsum(free)
+            free_before = np.concatenate(([0], free_seen))[segment_starts]
+            selected = free & (free_seen - np.repeat(free_before, sizes) <= np.repeat(capacity[active], sizes))
+
+            scanned[cells[selected]] = True
+            selected_owners = owners[selected]
+            books_scanned = np.bincount(selected_owners, minlength=len(active))
+            score = np.bincount(selected_owners, weights=self.score_array[books[selected]], minlength=len(active))
+
+            signed = books_scanned > 0
+            signed_individuals = active[signed]
+            scores[signed_individuals] += np.rint(score[signed]).astype(np.int64)
+            signed_counts[signed_individuals] += 1
+            curr_time[signed_individuals] += self.signup_days[lib_ids[signed]]
+
+        return scores, signed_counts
@@ -0,0 +1,103 @@
+import os
+from array import array
+
+from models.solution import Solution
+
+
+class CompactSolution:
+    """
+    Array-backed alternative to `Solution` for storing many individuals.
+
+    Signed and unsigned libraries are kept as `array('i')` orders, the books scanned by
+    signed library i are `books[book_offsets[i]:book_offsets[i + 1]]`, and the scanned
+    books are a bitmask of `ceil(num_books / 8)` bytes. Copies are a handful of memcpy
+    calls and the fitness is stored, not recomputed.
+
+    `signed_libraries`, `unsigned_libraries`, `scanned_books_per_library` and
+    `scanned_books` are read-only views built on access. Use `to_solution` to get a
+    `Solution` that can be modified.
+    """
+
+    order_hash = None
+    book_hash = 0
+
+    def __init__(self, num_books, signed, unsigned, book_offsets, books, scanned_mask, fitness_score=-1):
+        self.num_books = num_books
+        self.signed = signed
+        self.unsigned = unsigned
+        self.book_offsets = book_offsets
+        self.books = books
+        self.scanned_mask = scanned_mask
+        self.fitness_score = fitness_score
+
+    @classmethod
+    def from_solution(cls, solution, num_books):
+        signed = array('i', solution.signed_libraries)
+        book_offsets = array('i', [0])
+        books = array('i')
+        for lib_id in signed:
+            books.extend(solution.scanned_books_per_library.get(lib_id, []))
+            book_offsets.append(len(books))
+
+        scanned_mask = bytearray((num_books + 7) // 8)
+        for book in solution.scanned_books:
+            scanned_mask[book >> 3] |= 1 << (book & 7)
+
+        compact = cls(num_books, signed, array('i', solution.unsigned_libraries), book_offsets, books,
+                      scanned_mask, solution.fitness_score)
+        compact.order_hash = solution.order_hash
+        compact.book_hash = solution.book_hash
+        return compact
+
+    def to_solution(self):
+        solution = Solution(self.signed_libraries, self.unsigned_libraries,
+                            self.scanned_books_per_library, self.scanned_books)
+        solution.fitness_score = self.fitness_score
+        solution.order_hash = self.order_hash
+        solution.book_hash = self.book_hash
+        return solution
+
+    @property
+    def signed_libraries(self):
+        return self.signed.tolist()
+
+    @property
+    def unsigned_libraries(self):
+        return self.unsigned.tolist()
+
+    @property
+    def scanned_books_per_library(self):
+        offsets = self.book_offsets
+        return {lib_id: self.books[offsets[i]:offsets[i + 1]].tolist() for i, lib_id in enumerate(self.signed)}
+
+    @property
+    def scanned_books(self):
+        return set(self.books)
+
+    def library_books(self, index):
+        """Books scanned by the signed library at position `index`."""
+        return self.books[self.book_offsets[index]:self.book_offsets[index + 1]]
+
+    def is_scanned(self, book_id):
+        return (self.scanned_mask[book_id >> 3] >> (book_id & 7)) & 1 == 1
+
+    def export(self, file_path):
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        with open(file_path, "w+") as ofp:
+            ofp.write(f"{len(self.signed)}\n")
+            for i, library in enumerate(self.signed):
+                books = self.library_books(i)
+                ofp.write(f"{library} {len(books)}\n")
+                ofp.write(" ".join(map(str, books)) + "\n")
+
+    def calculate_fitness_score(self, scores):
+        self.fitness_score = sum(scores[book] for book in self.scanned_books)
+
+    def shallow_copy(self):
+        copy = CompactSolution(self.num_books, array('i', self.signed), array('i', self.unsigned),
+                               array('i', self.book_offsets), array('i', self.books),
+                               bytearray(self.scanned_mask), self.fitness_score)
+        copy.order_hash = self.order_hash
+        copy.book_hash = self.book_hash
+        return copy
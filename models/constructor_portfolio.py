@@ -0,0 +1,136 @@
+import multiprocessing
+import queue
+import random
+import time
+
+from models.compact_solution import CompactSolution
+from models.shared_instance import SharedInstance
+
+
+class ConstructorPortfolio:
+    """
+    Runs the constructors of `InitialSolution.generate_initial_solution` at the same
+    time, one worker process each, against one deadline:
+    - weighted_efficiency: `InitialSolution.tune_weighted_efficiency_parameters`
+    - greedy: `InitialSolution.generate_initial_greedy_heap`
+    - grasp: GRASP restarts with local search, for at most `GRASP_MAX_TIME` seconds
+    - sorted: `InitialSolution.generate_initial_solution_sorted`
+
+    Each constructor keeps its own time budget, capped at the deadline, so the portfolio
+    takes as long as its slowest constructor instead of all of them together. Workers
+    attach to the instance through `SharedInstance` and send `CompactSolution`s back;
+    GRASP sends every improvement, so its best restart survives the deadline. Workers
+    still running at the deadline are terminated.
+
+    After `run`, `results` maps every constructor that sent a solution to its best one,
+    and `cancelled` lists the constructors that were terminated.
+    """
+    CONSTRUCTORS = ('weighted_efficiency', 'greedy', 'grasp', 'sorted')
+    GRASP_MAX_TIME = 15
+    # Anytime constructors stop this long before the deadline to send their result
+    REPORT_MARGIN_SEC = 1.0
+    # Other results at least this share of the best score are kept as seeds
+    SEED_MIN_RATIO = 0.9
+
+    def __init__(self, data, time_limit=60, grasp_p=0.03, constructors=CONSTRUCTORS):
+        self.data = data
+        self.time_limit = time_limit
+        self.grasp_p = grasp_p
+        self.constructors = constructors
+        self.results = {}
+        self.cancelled = []
+
+    def run(self):
+        """Best solution and the seeds: the other distinct good results, best first."""
+        self.results = {}
+        self.cancelled = []
+        deadline = time.time() + self.time_limit
+        context = multiprocessing.get_context()
+        shared = SharedInstance.publish(self.data)
+        solutions = context.Queue()
+        processes = {}
+        running = set()
+        try:
+            for name in self.constructors:
+                processes[name] = context.Process(
+                    target=ConstructorPortfolio.run_worker,
+                    args=(shared.handle, name, deadline, self.grasp_p, random.getrandbits(64), solutions),
+                    daemon=True)
+                processes[name].start()
+
+            running = set(processes)
+            while running:
+                try:
+                    name, solution = solutions.get(timeout=max(0.0, deadline - time.time()))
+                except queue.Empty:
+                    break
+                if solution is None:
+                    running.discard(name)
+                elif name not in self.results or solution.fitness_score > self.results[name].fitness_score:
+                    self.results[name] = solution
+        finally:
+            for name, process in processes.items():
+                if name in running:
+                    self.cancelled.append(name)
+                # Finished workers may still be exiting
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+            shared.unlink()
+
+        return self.best_and_seeds()
+
+    def best_and_seeds(self):
+        ranked = sorted((solution.to_solution() for solution in self.results.values()),
+                        key=lambda solution: -solution.fitness_score)
+        if not ranked or ranked[0].fitness_score <= 0:
+            raise Exception("No valid initial solution could be generated")
+
+        best = ranked[0]
+        seeds = []
+        orders = {tuple(best.signed_libraries)}
+        for solution in ranked[1:]:
+            order = tuple(solution.signed_libraries)
+            if order not in orders and solution.fitness_score >= best.fitness_score * ConstructorPortfolio.SEED_MIN_RATIO:
+                orders.add(order)
+                seeds.append(solution)
+        return best, seeds
+
+    @staticmethod
+    def run_worker(instance_handle, name, deadline, grasp_p, seed, solutions):
+        # Imported here, `InitialSolution` creates the portfolio
+        from models.initial_solution import InitialSolution
+        from models.local_search import LocalSearch
+
+        random.seed(seed)
+        instance = SharedInstance.attach(instance_handle)
+        time_left = deadline - ConstructorPortfolio.REPORT_MARGIN_SEC - time.time()
+
+        def send(solution):
+            solutions.put((name, CompactSolution.from_solution(solution, instance.num_books)))
+
+        try:
+            if name == 'weighted_efficiency':
+                _, _, _, solution = InitialSolution.tune_weighted_efficiency_parameters(instance, time_limit=time_left)
+                if solution is not None:
+                    send(solution)
+            elif name == 'greedy':
+                send(InitialSolution.generate_initial_greedy_heap(instance))
+            elif name == 'sorted':
+                send(InitialSolution.generate_initial_solution_sorted(instance))
+            elif name == 'grasp':
+                end = time.time() + min(ConstructorPortfolio.GRASP_MAX_TIME, time_left)
+                best_score = None
+                while time.time() < end:
+                    solution = LocalSearch.local_search(InitialSolution.build_grasp_solution(instance, grasp_p), instance,
+                                                        time_limit=min(5, max(0.0, end - time.time())),
+                                                        max_iterations=100)
+                    if best_score is None or solution.fitness_score > best_score:
+                        best_score = solution.fitness_score
+                        send(solution)
+            else:
+                raise ValueError(f'Unknown constructor: {name}')
+        except Exception as e:
+            print(f"Error generating solution with {name}: {e}")
+        # The constructor is done, with or without a solution
+        solutions.put((name, None))
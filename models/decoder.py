@@ -0,0 +1,401 @@
+import time
+import weakref
+
+import numpy as np
+
+from models.fingerprint import FingerprintKeys
+from models.solution import Solution
+
+
+class Decoder:
+    """
+    Turns an order of libraries into a feasible solution.
+
+    Libraries are signed up in the given order. A library is signed if its signup
+    finishes before the last day and it still has unscanned books; it then scans its
+    best unscanned books (in `Library.books` order) for the remaining days. Every other
+    library is appended to the unsigned libraries.
+
+    The books of every library are walked in their pre-sorted order against a
+    `bytearray` mask of already scanned books. Small libraries are walked in Python,
+    large ones through a NumPy view on the same mask.
+    """
+    # Libraries with more books than this are scanned with NumPy
+    VECTORIZE_THRESHOLD = 48
+    # Signed libraries between two checkpoints, 0 disables checkpoints
+    CHECKPOINT_STRIDE = 8
+
+    _decoders = weakref.WeakKeyDictionary()
+    # Optional `FitnessCache` consulted by `decode` and `decode_from`
+    fitness_cache = None
+    # Optional `GenerationTelemetry` that gets the time spent decoding
+    telemetry = None
+
+    def __init__(self, data, checkpoint_stride=CHECKPOINT_STRIDE):
+        self.data = data
+        self.checkpoint_stride = checkpoint_stride
+        self.num_days = data.num_days
+        self.num_books = data.num_books
+        self.num_libs = data.num_libs
+        self.scores = data.scores
+        self.score_array = data.score_array
+        self.signup_days = data.lib_signup_days.tolist()
+        self.books_per_day = data.lib_books_per_day.tolist()
+        self.lib_sizes = np.diff(data.lib_book_offsets).tolist()
+        self._book_lists = [None] * data.num_libs
+        self._fingerprint_keys = None
+
+    @staticmethod
+    def for_instance(data):
+        """Returns the decoder of an instance, creating it on first use."""
+        decoder = Decoder._decoders.get(data)
+        if decoder is None:
+            decoder = Decoder(data)
+            Decoder._decoders[data] = decoder
+        return decoder
+
+    @staticmethod
+    def release(data):
+        """Drops the decoder of an instance; it keeps the instance alive otherwise."""
+        Decoder._decoders.pop(data, None)
+
+    def library_books(self, lib_id):
+        """Book ids of a library as a Python list, sorted by score (highest first)."""
+        books = self._book_lists[lib_id]
+        if books is None:
+            books = self.data.library_books(lib_id).tolist()
+            self._book_lists[lib_id] = books
+        return books
+
+    @property
+    def fingerprint_keys(self):
+        if self._fingerprint_keys is None:
+            self._fingerprint_keys = FingerprintKeys(self.num_libs, self.num_books)
+        return self._fingerprint_keys
+
+    def fingerprint(self, solution):
+        """
+        Fingerprint of a solution, see `FingerprintKeys`. Solutions that were not built
+        by the decoder get their hashes computed here once, which costs one decode.
+        """
+        if solution.order_hash is None:
+            keys = self.fingerprint_keys
+            decoded = self._decode(solution.signed_libraries, [])
+            solution.order_hash = keys.order_hash(solution.signed_libraries)
+            solution.book_hash = keys.book_hash(solution.scanned_books ^ decoded.scanned_books)
+        return solution.order_hash ^ solution.book_hash
+
+    def scan_library(self, lib_id, capacity, mask, mask_view):
+        """
+        Picks up to `capacity` of the best books of a library that are not set in `mask`,
+        marks them as scanned and returns them with their total score.
+        """
+        if self.lib_sizes[lib_id] > Decoder.VECTORIZE_THRESHOLD:
+            books = self.data.library_books(lib_id)
+            selected = books[~mask_view[books]][:capacity]
+            mask_view[selected] = True
+            return selected.tolist(), int(self.score_array[selected].sum())
+
+        scores = self.scores
+        selected = []
+        score = 0
+        for book in self.library_books(lib_id):
+            if not mask[book]:
+                mask[book] = 1
+                selected.append(book)
+                score += scores[book]
+                if len(selected) == capacity:
+                    break
+        return selected, score
+
+    def decode(self, order, unsigned_libs=None):
+        """
+        Decodes `order` into a new solution. Libraries of `order` that cannot be signed
+        are appended to a copy of `unsigned_libs`; without `unsigned_libs` the unsigned
+        libraries are all libraries that end up not signed, in id order. Raises
+        `ValueError` if `order` repeats a library that got signed.
+        """
+        cache = self.fitness_cache
+        if cache is not None:
+            key = cache.fingerprint(order, unsigned_libs)
+            solution = cache.get(key)
+            if solution is None:
+                solution = cache.put(key, self._decode(order, unsigned_libs))
+            return solution
+        return self._decode(order, unsigned_libs)
+
+    def _decode(self, order, unsigned_libs):
+        mask = bytearray(self.num_books)
+        checkpoints = DecodeCheckpoints(self.checkpoint_stride, mask) if self.checkpoint_stride else None
+        signed = []
+        scanned_per_lib = {}
+        scanned_books = set()
+        rejected, fitness = self._run(order, mask, signed, scanned_per_lib, scanned_books, 0, 0, checkpoints)
+        solution = self._build(signed, rejected, unsigned_libs, scanned_per_lib, scanned_books, fitness, checkpoints)
+        solution.order_hash = self.fingerprint_keys.order_hash(signed)
+        return solution
+
+    def decode_from(self, solution, order, start, unsigned_libs=None):
+        """
+        Decodes `order`, which must start with `solution.signed_libraries[:start]`, by
+        resuming from the checkpoint of `solution` closest before `start` instead of
+        day 0. Only the libraries after that checkpoint are decoded again. Falls back
+        to `decode` when the solution carries no checkpoints.
+        """
+        checkpoints = solution.checkpoints
+        if checkpoints is None or checkpoints.stride != self.checkpoint_stride:
+            return self.decode(order, unsigned_libs)
+
+        cache = self.fitness_cache
+        if cache is not None:
+            key = cache.fingerprint(order, unsigned_libs)
+            cached = cache.get(key)
+            if cached is None:
+                cached = cache.put(key, self._decode_from(solution, order, start, unsigned_libs))
+            return cached
+        return self._decode_from(solution, order, start, unsigned_libs)
+
+    def _decode_from(self, solution, order, start, unsigned_libs):
+        checkpoints = solution.checkpoints
+        index = min(start // checkpoints.stride, len(checkpoints.days) - 1)
+        position = index * checkpoints.stride
+
+        # Undo the libraries after the checkpoint on copies of the solution's state
+        mask = bytearray(checkpoints.mask)
+        scanned_per_lib = solution.scanned_books_per_library.copy()
+        scanned_books = solution.scanned_books.copy()
+        self._unscan(solution.signed_libraries[position:], mask, scanned_per_lib, scanned_books)
+
+        resumed = DecodeCheckpoints(checkpoints.stride, mask,
+                                    checkpoints.days[:index + 1], checkpoints.scores[:index + 1])
+        signed = solution.signed_libraries[:position]
+        rejected, fitness = self._run(order[position:], mask, signed, scanned_per_lib, scanned_books,
+                                      checkpoints.days[index], checkpoints.scores[index], resumed)
+        decoded = self._build(signed, rejected, unsigned_libs, scanned_per_lib, scanned_books, fitness, resumed)
+        decoded.order_hash = self._resume_order_hash(solution, position, signed)
+        return decoded
+
+    def redecode_in_place(self, solution, start, suffix):
+        """
+        Replaces `solution.signed_libraries[start:]` by `suffix` and decodes the result
+        in place, starting from the checkpoint closest before `start`. Libraries that
+        cannot be signed are appended to `solution.unsigned_libraries`. The solution must
+        own its containers (see `Solution.make_writable`).
+
+        Returns an `UndoRecord` for `rollback`. Solutions without checkpoints are
+        decoded into new containers, and the record keeps the old ones.
+        """
+        checkpoints = solution.checkpoints
+        record = UndoRecord(solution)
+
+        if checkpoints is None or checkpoints.stride != self.checkpoint_stride:
+            decoded = self._decode(solution.signed_libraries[:start] + list(suffix), solution.unsigned_libraries)
+            solution.signed_libraries = decoded.signed_libraries
+            solution.unsigned_libraries = decoded.unsigned_libraries
+            solution.scanned_books_per_library = decoded.scanned_books_per_library
+            solution.scanned_books = decoded.scanned_books
+            solution.fitness_score = decoded.fitness_score
+            solution.checkpoints = decoded.checkpoints
+            solution.order_hash = decoded.order_hash
+            solution.book_hash = 0
+            return record
+
+        index = min(start // checkpoints.stride, len(checkpoints.days) - 1)
+        position = index * checkpoints.stride
+        signed = solution.signed_libraries
+        order = signed[position:start] + list(suffix)
+
+        record.position = position
+        record.mask = bytes(checkpoints.mask)
+        record.old_tail = signed[position:]
+        record.old_books = self._unscan(record.old_tail, checkpoints.mask,
+                                        solution.scanned_books_per_library, solution.scanned_books)
+        record.old_days = checkpoints.days[index + 1:]
+        record.old_scores = checkpoints.scores[index + 1:]
+        del signed[position:]
+        del checkpoints.days[index + 1:]
+        del checkpoints.scores[index + 1:]
+
+        rejected, fitness = self._run(order, checkpoints.mask, signed, solution.scanned_books_per_library,
+                                      solution.scanned_books, checkpoints.days[index], checkpoints.scores[index],
+                                      checkpoints)
+        solution.unsigned_libraries.extend(rejected)
+        solution.fitness_score = fitness
+        solution.order_hash = self._resume_order_hash(solution, position, signed, record.old_tail)
+        return record
+
+    def rollback(self, solution, record):
+        """Restores `solution` to its state before the `redecode_in_place` call that returned `record`."""
+        if record.position is None:
+            solution.signed_libraries = record.signed_libraries
+            solution.unsigned_libraries = record.unsigned_libraries
+            solution.scanned_books_per_library = record.scanned_books_per_library
+            solution.scanned_books = record.scanned_books
+            solution.checkpoints = record.checkpoints
+        else:
+            checkpoints = solution.checkpoints
+            signed = solution.signed_libraries
+            scanned_per_lib = solution.scanned_books_per_library
+            scanned_books = solution.scanned_books
+            for lib_id in signed[record.position:]:
+                scanned_books.difference_update(scanned_per_lib.pop(lib_id))
+            del signed[record.position:]
+            del solution.unsigned_libraries[record.unsigned_length:]
+            index = record.position // checkpoints.stride
+            del checkpoints.days[index + 1:]
+            del checkpoints.scores[index + 1:]
+            checkpoints.days.extend(record.old_days)
+            checkpoints.scores.extend(record.old_scores)
+
+            checkpoints.mask[:] = record.mask
+            for lib_id, books in zip(record.old_tail, record.old_books):
+                signed.append(lib_id)
+                scanned_per_lib[lib_id] = books
+                scanned_books.update(books)
+        solution.fitness_score = record.fitness_score
+        solution.order_hash = record.order_hash
+        solution.book_hash = record.book_hash
+
+    def _resume_order_hash(self, solution, position, signed, old_tail=None):
+        """
+        Order hash of `signed`, which shares its first `position` libraries with the
+        order `solution.order_hash` was computed for (whose tail is `old_tail`).
+        """
+        keys = self.fingerprint_keys
+        if solution.order_hash is None:
+            return keys.order_hash(signed)
+        if old_tail is None:
+            old_tail = solution.signed_libraries[position:]
+        prefix_hash = keys.remove_order_hash(old_tail, position, solution.order_hash)
+        return keys.order_hash(signed[position:], position, prefix_hash)
+
+    def _unscan(self, libs, mask, scanned_per_lib, scanned_books):
+        """Removes the books of `libs` from the given state and returns them, in order."""
+        mask_view = np.frombuffer(mask, dtype=np.bool_)
+        removed = []
+        for lib_id in libs:
+            books = scanned_per_lib.pop(lib_id)
+            if len(books) > Decoder.VECTORIZE_THRESHOLD:
+                mask_view[books] = False
+            else:
+                for book in books:
+                    mask[book] = 0
+            scanned_books.difference_update(books)
+            removed.append(books)
+        return removed
+
+    def _build(self, signed, rejected, unsigned_libs, scanned_per_lib, scanned_books, fitness, checkpoints):
+        if unsigned_libs is None:
+            unsigned = [lib_id for lib_id in range(self.num_libs) if lib_id not in scanned_per_lib]
+        else:
+            unsigned = list(unsigned_libs)
+            unsigned.extend(rejected)
+
+        solution = Solution(signed, unsigned, scanned_per_lib, scanned_books)
+        solution.fitness_score = fitness
+        solution.checkpoints = checkpoints
+        return solution
+
+    def _run(self, order, mask, signed, scanned_per_lib, scanned_books, curr_time, fitness, checkpoints):
+        """
+        Decodes `order` on top of the given state, which is updated in place.
+        Returns the rejected libraries and the new fitness.
+        """
+        num_days = self.num_days
+        signup_days = self.signup_days
+        books_per_day = self.books_per_day
+        stride = checkpoints.stride if checkpoints is not None else 0
+        scores = self.scores
+        lib_sizes = self.lib_sizes
+        book_lists = self._book_lists
+        vectorize_threshold = Decoder.VECTORIZE_THRESHOLD
+        telemetry = self.telemetry
+        started = time.perf_counter() if telemetry is not None else 0.0
+
+        mask_view = np.frombuffer(mask, dtype=np.bool_)
+        rejected = []
+
+        for lib_id in order:
+            if lib_id in scanned_per_lib:
+                # A second signup would overwrite the library's books and break `_unscan`
+                raise ValueError(f"Library {lib_id} appears twice in the order")
+            time_left = num_days - (curr_time + signup_days[lib_id])
+            capacity = time_left * books_per_day[lib_id]
+            if time_left <= 0 or capacity <= 0:
+                rejected.append(lib_id)
+                continue
+
+            if lib_sizes[lib_id] > vectorize_threshold:
+                selected, score = self.scan_library(lib_id, capacity, mask, mask_view)
+            else:
+                # Inlined small-library path of `scan_library`
+                selected = []
+                score = 0
+                for book in book_lists[lib_id] or self.library_books(lib_id):
+                    if not mask[book]:
+                        mask[book] = 1
+                        selected.append(book)
+                        score += scores[book]
+                        if len(selected) == capacity:
+                            break
+            if not selected:
+                rejected.append(lib_id)
+                continue
+
+            if stride and len(signed) == len(checkpoints.days) * stride:
+                checkpoints.days.append(curr_time)
+                checkpoints.scores.append(fitness)
+
+            signed.append(lib_id)
+            scanned_per_lib[lib_id] = selected
+            scanned_books.update(selected)
+            fitness += score
+            curr_time += signup_days[lib_id]
+
+        if telemetry is not None:
+            telemetry.add_time('decoding', time.perf_counter() - started)
+            telemetry.count('decoded_libraries', len(order))
+        return rejected, fitness
+
+
+class UndoRecord:
+    """What `Decoder.redecode_in_place` replaced, see `Decoder.rollback`."""
+
+    def __init__(self, solution):
+        self.fitness_score = solution.fitness_score
+        self.order_hash = solution.order_hash
+        self.book_hash = solution.book_hash
+        self.unsigned_length = len(solution.unsigned_libraries)
+        # Containers replaced when the solution had no checkpoints
+        self.signed_libraries = solution.signed_libraries
+        self.unsigned_libraries = solution.unsigned_libraries
+        self.scanned_books_per_library = solution.scanned_books_per_library
+        self.scanned_books = solution.scanned_books
+        self.checkpoints = solution.checkpoints
+        # Tail removed by an in-place decode
+        self.position = None
+        self.old_tail = None
+        self.old_books = None
+        self.old_days = None
+        self.old_scores = None
+        self.mask = None
+
+
+class DecodeCheckpoints:
+    """
+    Decoder state recorded while a solution is decoded: `days[i]` and `scores[i]` are
+    the signup day and the fitness before signed library `i * stride` was decoded, and
+    `mask` marks every book the solution scans. The scanned books at a checkpoint are
+    `mask` minus the books of the libraries after it, so they are not stored
+    separately. Checkpoints are shared between copies; only `Decoder.redecode_in_place`
+    modifies them, on a solution that owns them.
+    """
+
+    def __init__(self, stride, mask, days=None, scores=None):
+        self.stride = stride
+        self.mask = mask
+        self.days = days if days is not None else [0]
+        self.scores = scores if scores is not None else [0]
+
+    def copy(self):
+        return DecodeCheckpoints(self.stride, bytearray(self.mask), self.days.copy(), self.scores.copy())
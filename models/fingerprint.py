@@ -0,0 +1,42 @@
+import numpy as np
+
+
+class FingerprintKeys:
+    """
+    Random 64-bit keys for Zobrist-style solution fingerprints.
+
+    The fingerprint of a solution is `order_hash ^ book_hash`:
+    - `order_hash` is the sum of `library_keys[lib] * position_keys[i]` over the signed
+      libraries, modulo 2^64, so appending, removing or moving a library only touches
+      the terms of the positions that change.
+    - `book_hash` is the XOR of `book_keys[book]` over the books a solution scans on
+      top of, or instead of, the books the decoder would pick for its order. It is 0 for
+      every decoded solution and is updated by XOR-ing both books of a replacement.
+    """
+    MASK = (1 << 64) - 1
+    SEED = 0x5EED
+
+    def __init__(self, num_libs, num_books, seed=SEED):
+        rng = np.random.default_rng(seed)
+        # Odd library keys keep every position key in the product
+        self.library_keys = (rng.integers(0, 1 << 63, num_libs, dtype=np.uint64) * 2 + 1).tolist()
+        self.position_keys = rng.integers(0, 1 << 63, num_libs, dtype=np.uint64).tolist()
+        self.book_keys = rng.integers(0, 1 << 63, num_books, dtype=np.uint64).tolist()
+
+    def order_hash(self, libs, start=0, order_hash=0):
+        """Adds the terms of `libs`, placed from position `start` on, to `order_hash`."""
+        library_keys = self.library_keys
+        position_keys = self.position_keys
+        for position, lib_id in enumerate(libs, start):
+            order_hash += library_keys[lib_id] * position_keys[position]
+        return order_hash & FingerprintKeys.MASK
+
+    def remove_order_hash(self, libs, start, order_hash):
+        """Removes the terms of `libs`, placed from position `start` on, from `order_hash`."""
+        return (order_hash - self.order_hash(libs, start)) & FingerprintKeys.MASK
+
+    def book_hash(self, books, book_hash=0):
+        book_keys = self.book_keys
+        for book in books:
+            book_hash ^= book_keys[book]
+        return book_hash
@@ -0,0 +1,59 @@
+from collections import OrderedDict
+
+
+class FitnessCache:
+    """
+    Bounded LRU cache of decoded solutions, keyed by a fingerprint of the decoded
+    library order and of the unsigned libraries it was decoded with.
+
+    The fingerprint is Python's 64-bit tuple hash of both sequences plus their lengths,
+    so a lookup costs one pass over the order in C instead of a decode. Callers get
+    copy-on-write clones of the cached solutions, see `Solution.clone`.
+
+    Usage:
+    decoder.fitness_cache = FitnessCache()
+    decoder.decode(order)                  # decodes and caches
+    decoder.decode(order)                  # clone of the cached solution
+    print(decoder.fitness_cache)           # hit/miss statistics
+    """
+    MAX_SIZE = 128
+
+    def __init__(self, max_size=MAX_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(order, unsigned_libs=None):
+        if unsigned_libs is None:
+            return hash(tuple(order)), len(order), -1
+        return hash((tuple(order), tuple(unsigned_libs))), len(order), len(unsigned_libs)
+
+    def get(self, key):
+        solution = self.entries.get(key)
+        if solution is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return solution.clone()
+
+    def put(self, key, solution):
+        """Caches `solution` and returns a clone of it for the caller."""
+        self.entries[key] = solution
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return solution.clone()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate, 'size': len(self.entries)}
+
+    def __str__(self):
+        return f'hits: {self.hits}, misses: {self.misses}, hit rate: {self.hit_rate:.1%}'
@@ -2,7 +2,17 @@ import random
 import time
 from typing import Tuple
 
-from models.selection_strategies import SelectionStrategies
+from models.compact_solution import CompactSolution
+from models.decoder import Decoder
+from models.fitness_cache import FitnessCache
+from models.solver_checkpoint import SolverCheckpoint
+from models.solution_writer import SolutionWriter
+from models.immigrant_pool import ImmigrantPool
+from models.offspring_pool import OffspringPool
+from models.operator_scheduler import OperatorScheduler
+from models.population import Population
+from models.selection_strategies import SelectionTables
+from models.telemetry import GenerationTelemetry, NO_TIMER
 from models.tweaks import Tweaks
 from models.solution import Solution
 from models.instance_data import InstanceData
@@ -19,9 +29,31 @@ class GeneticSolver:
                  immigrant_frac=0.06,
                  steady_state_ratio=0.25,
                  time_limit_sec=10 * 60,
-                 tweak_steps=5
+                 tweak_steps=5,
+                 compact_population=False,
+                 fitness_cache_size=FitnessCache.MAX_SIZE,
+                 deduplicate=True,
+                 migration=None,
+                 offspring_workers=0,
+                 immigrant_worker=False,
+                 checkpoint_path=None,
+                 checkpoint_interval_sec=60,
+                 resume=False,
+                 resume_from=None,
+                 keep_final_state=False,
+                 output_path=None,
+                 trace_path=None,
+                 stream_interval_sec=5.0,
+                 stream_min_improvement=None,
+                 stop_gap=0.0,
+                 adaptive_tweaks=False,
+                 telemetry_path=None,
+                 seed_solutions=()
                  ):
         self.initial_solution = initial_solution
+        # Other good solutions that join the initial population as they are, e.g. the
+        # runners-up of `ConstructorPortfolio`
+        self.seed_solutions = list(seed_solutions)
         self.instance = instance
         self.population_size = population_size
         self.generations = generations
@@ -34,32 +66,234 @@ class GeneticSolver:
         self.steady_state_ratio = steady_state_ratio
         self.steady_gen_start = int(self.generations * (1 - steady_state_ratio))
         self.steady_time_start = self.time_limit_sec * (1 - steady_state_ratio)
-
-    def solve(self):
-        # Initialize population with slight variations of initial solution
-        population = self.initialize_population(self.initial_solution)
-
-        start_time = time.time()
-
+        # Keep individuals as `CompactSolution` while they sit in the population
+        self.compact_population = compact_population
+        # Decoded orders are looked up here before decoding them again, 0 disables it
+        self.fitness_cache = FitnessCache(fitness_cache_size) if fitness_cache_size > 0 else None
+        self.decoder = Decoder.for_instance(instance)
+        # Reject offspring whose fingerprint is already in the population
+        self.deduplicate = deduplicate
+        self.duplicates_rejected = 0
+        # Distinct fingerprints / population size, per generation
+        self.diversity_history = []
+        # (elapsed seconds, fitness) whenever the best solution improved
+        self.best_history = []
+        # Called once per generation as migration(generation, elapsed, population), returns
+        # the solutions that migrate into the population (see `IslandModel`)
+        self.migration = migration
+        # Worker processes for generational offspring, 0 creates them in this process
+        self.offspring_workers = offspring_workers
+        self.offspring_pool = None
+        # Make immigrants in a background process, see `ImmigrantPool`
+        self.immigrant_worker = immigrant_worker
+        self.immigrant_pool = None
+        # Snapshot the run every `checkpoint_interval_sec` seconds, see `SolverCheckpoint`.
+        # With `resume` the run continues from the snapshot of an interrupted run with the
+        # same configuration, if there is one. A finished run deletes its snapshot
+        self.checkpoint = SolverCheckpoint(checkpoint_path) if checkpoint_path else None
+        self.checkpoint_interval_sec = checkpoint_interval_sec
+        self.resume = resume
+        # With `keep_final_state` a finished run leaves its `(population, state)` in
+        # `final_state`, and a solver with the same parameters continues it when it gets
+        # that as `resume_from` (see `PipelineRunner`)
+        self.keep_final_state = keep_final_state
+        self.final_state = None
+        self._snapshot = resume_from
+        # Anytime mode: every new best solution goes to `output_path`, at most every
+        # `stream_interval_sec` seconds unless it improved by `stream_min_improvement`,
+        # and (elapsed seconds, score) to `trace_path`, see `SolutionWriter`
+        self.output_path = output_path
+        self.trace_path = trace_path
+        self.stream_interval_sec = stream_interval_sec
+        self.stream_min_improvement = stream_min_improvement
+        self.solution_writer = None
+        # Stop once the relative gap between the best solution and `upper_bound` is at
+        # most `stop_gap`; 0 stops only on a provably optimal solution, None never stops
+        self.stop_gap = stop_gap
+        self.upper_bound = None
+        self.gap = None
+        # Pick tweaks by their recent fitness gain per CPU-second instead of
+        # `Tweaks.WEIGHTS`, see `OperatorScheduler`; the statistics stay available
+        # in `operator_scheduler` after the run
+        self.adaptive_tweaks = adaptive_tweaks
+        self.operator_scheduler = None
+        # Write per-generation timings and counters as JSON lines to `telemetry_path`,
+        # see `GenerationTelemetry`
+        self.telemetry_path = telemetry_path
+        self.telemetry = None
+        # `time.time()` by which `solve` returns, see `solve`
+        self.deadline = None
+
+    @property
+    def checkpoint_config(self):
+        """
+        Parameters a snapshot is only resumed with if they are unchanged. The time limit
+        is left out, so that a snapshot can be resumed with more time.
+        """
+        return {
+            'population_size': self.population_size,
+            'generations': self.generations,
+            'mutation_prob': self.mutation_prob,
+            'crossover_rate': self.crossover_rate,
+            'steady_state_ratio': self.steady_state_ratio,
+            'tweak_steps': self.tweak_steps,
+            'compact_population': self.compact_population,
+            'deduplicate': self.deduplicate,
+            'adaptive_tweaks': self.adaptive_tweaks,
+        }
+
+    def load_checkpoint(self):
+        """
+        The snapshot `solve` resumes from as `(population, state)`, or None. Lets callers
+        skip building an initial solution, which a resumed run does not need.
+        """
+        if self._snapshot is None and self.resume and self.checkpoint is not None:
+            self._snapshot = self.checkpoint.load(self.instance, self.checkpoint_config)
+        return self._snapshot
+
+    def solve(self, deadline=None):
+        """
+        Runs the GA and returns the best solution. With `deadline` (a `time.time()`
+        value) the population initialization stops tweaking at the deadline, and a
+        generation is only started if the slowest one of its phase so far would still
+        finish before it. A generation that runs into the deadline anyway is filled up
+        with the best individuals of the previous one.
+        """
+        self.deadline = deadline
+        snapshot = self.load_checkpoint()
+        seed_solution = self.initial_solution
+        if seed_solution is None:
+            if snapshot is None:
+                raise ValueError("GeneticSolver needs an initial solution when there is no snapshot to resume")
+            # Snapshots are ranked, best first
+            seed_solution = self.expand(snapshot[0][0])
+
+        self.upper_bound = self.instance.calculate_tight_upper_bound()
+        self.decoder.fitness_cache = self.fitness_cache
+        if self.offspring_workers > 0:
+            self.offspring_pool = OffspringPool(self.instance, self.offspring_workers,
+                                                self.mutation_prob, self.tweak_steps)
+        self.immigrant_pool = ImmigrantPool(seed_solution, self.instance, self.tweak_steps,
+                                            worker=self.immigrant_worker)
+        if self.adaptive_tweaks:
+            self.operator_scheduler = OperatorScheduler(Tweaks.get_tweak_methods_by_name(), Tweaks.WEIGHTS)
+            Tweaks.scheduler = self.operator_scheduler
+        if self.telemetry_path is not None:
+            self.telemetry = GenerationTelemetry(self.telemetry_path)
+            self.decoder.telemetry = self.telemetry
+            Tweaks.telemetry = self.telemetry
+        if self.output_path is not None or self.trace_path is not None:
+            # A resumed run continues the trace of the run it resumes
+            self.solution_writer = SolutionWriter(self.output_path, self.trace_path,
+                                                  self.stream_interval_sec, self.stream_min_improvement,
+                                                  append=snapshot is not None)
+        try:
+            return self._solve()
+        finally:
+            self.decoder.fitness_cache = None
+            Tweaks.scheduler = None
+            if self.telemetry is not None:
+                self.decoder.telemetry = None
+                Tweaks.telemetry = None
+                self.telemetry.close()
+                self.telemetry = None
+            if self.solution_writer is not None:
+                self.solution_writer.close()
+                self.solution_writer = None
+            self.immigrant_pool.close()
+            self.immigrant_pool = None
+            if self.offspring_pool is not None:
+                self.offspring_pool.close()
+                self.offspring_pool = None
+
+    def _solve(self):
         best_fitness = None
         plateau_counter = 0
         base_immigrant_frac = self.immigrant_frac
-
-        for generation in range(self.generations):
-            elapsed = time.time() - start_time
+        first_generation = 0
+        elapsed = 0
+
+        snapshot = self.load_checkpoint()
+        self._snapshot = None
+        # Slowest generation so far by phase (steady-state or not), which the next one
+        # may take; a generation tweaks about as many solutions as the initialization
+        generation_sec = {False: 0.0, True: 0.0}
+        if snapshot is not None:
+            individuals, state = snapshot
+            population = self.new_population(self.store(solution) for solution in individuals)
+            first_generation = state['generation']
+            elapsed = state['elapsed']
+            best_fitness = state['best_fitness']
+            plateau_counter = state['plateau_counter']
+            base_immigrant_frac = state['base_immigrant_frac']
+            self.immigrant_frac = state['immigrant_frac']
+            self.duplicates_rejected = state['duplicates_rejected']
+            self.diversity_history = state['diversity_history']
+            self.best_history = state['best_history']
+            if self.operator_scheduler is not None:
+                self.operator_scheduler.restore(state['operator_scheduler'])
+            random.setstate(state['random_state'])
+        else:
+            # Initialize population with slight variations of initial solution
+            initialization_start = time.time()
+            population = self.new_population(self.initialize_population(self.initial_solution))
+            generation_sec[False] = time.time() - initialization_start
+
+        if self.telemetry is not None:
+            # Generation 0 starts counting here, not with the population initialization
+            self.telemetry.reset()
+
+        # Time already spent by the run the snapshot came from counts against the limit
+        start_time = time.time() - elapsed
+        last_checkpoint = time.time()
+
+        def current_state(next_generation):
+            return {
+                'generation': next_generation,
+                'elapsed': time.time() - start_time,
+                'best_fitness': best_fitness,
+                'plateau_counter': plateau_counter,
+                'base_immigrant_frac': base_immigrant_frac,
+                'immigrant_frac': self.immigrant_frac,
+                'duplicates_rejected': self.duplicates_rejected,
+                'diversity_history': list(self.diversity_history),
+                'best_history': list(self.best_history),
+                'operator_scheduler': self.operator_scheduler.state() if self.operator_scheduler is not None else None,
+                'random_state': random.getstate(),
+            }
+
+        def save_checkpoint(next_generation):
+            self.checkpoint.save(self.instance, self.checkpoint_config, population.ranked(),
+                                 current_state(next_generation))
+
+        for generation in range(first_generation, self.generations):
+            generation_start = time.time()
+            elapsed = generation_start - start_time
             if elapsed >= self.time_limit_sec:
                 # print(f"Stopping at gen {generation} due to time limit ({elapsed:.1f}s)")
                 break
 
+            # decide whether to use generational or steady-state:
+            use_steady = (
+                    generation >= self.steady_gen_start
+                    or elapsed >= self.steady_time_start
+            )
+            if self.deadline is not None and generation_start + generation_sec[use_steady] > self.deadline:
+                break
+
             # Evaluate population
-            population = sorted(population, key=lambda x: x.fitness_score, reverse=True)
-            best_solution = population[0]
-            # print(f"Gen {generation}: Best fitness = {best_solution.fitness_score}")
+            best_solution = population.best
+            self.diversity_history.append(population.diversity())
+            # print(f"Gen {generation}: Best fitness = {best_solution.fitness_score}, "
+            #       f"diversity = {self.diversity_history[-1]:.2f}")
 
             # Plateau tracking
             if best_fitness is None or best_solution.fitness_score > best_fitness:
                 best_fitness = best_solution.fitness_score
                 plateau_counter = 0
+                self.best_history.append((elapsed, best_fitness))
+                if self.solution_writer is not None:
+                    self.solution_writer.submit(best_solution, elapsed)
                 self.immigrant_frac = base_immigrant_frac  # Reset if improvement
             else:
                 plateau_counter += 1
@@ -67,11 +301,11 @@ class GeneticSolver:
                 if plateau_counter > 5:
                     self.immigrant_frac = min(1.0, self.immigrant_frac * 1.5)
 
-            # decide whether to use generational or steady-state:
-            use_steady = (
-                    generation >= self.steady_gen_start
-                    or elapsed >= self.steady_time_start
-            )
+            # Stop when the best solution is optimal, or close enough to the upper bound
+            if self.stop_gap is not None and self.relative_gap(best_fitness) <= self.stop_gap:
+                # print(f"Stopping at gen {generation}, gap to the upper bound {self.relative_gap(best_fitness):.4%}")
+                break
+
             if not use_steady:
                 new_population = self.create_offspring_generative(population)
             else:
@@ -79,79 +313,213 @@ class GeneticSolver:
 
             num_immigrants = int(self.immigrant_frac * self.population_size)
             if num_immigrants > 0:
-                immigrants = self.initialize_population(self.initial_solution)[:num_immigrants]
-
-                # Remove worst individuals to make room for immigrants
-                new_population = sorted(new_population, key=lambda x: x.fitness_score, reverse=True)
-                new_population = new_population[:-num_immigrants] + immigrants
+                with self.timer('immigrants'):
+                    immigrants = [self.store(immigrant) for immigrant in self.immigrant_pool.take(num_immigrants)]
+
+                    # Immigrants replace the worst individuals
+                    new_population.replace_worst(immigrants)
+                if self.telemetry is not None:
+                    self.telemetry.count('immigrants', num_immigrants)
+
+            if self.migration is not None:
+                with self.timer('migration'):
+                    migrants = self.migration(generation, elapsed, population.ranked())
+                    if migrants:
+                        # Migrants replace the worst individuals they are better than
+                        self.admit(migrants, new_population)
+                if migrants and self.telemetry is not None:
+                    self.telemetry.count('migrants', len(migrants))
 
             # Ensure best solution is not lost
-            if best_solution.fitness_score > min(new_population, key=lambda x: x.fitness_score).fitness_score:
-                new_population[-1] = best_solution
+            if best_solution.fitness_score > new_population.worst.fitness_score and \
+                    not new_population.has_fingerprint(self.decoder.fingerprint(best_solution)):
+                new_population.add(best_solution)
 
             # Update population
-            population = new_population[:self.population_size]
-
-        return max(population, key=lambda x: x.fitness_score)
-
-    def create_offspring_generative(self, population):
-        new_population = []
-        while len(new_population) < self.population_size:
-            selection_method = SelectionStrategies.choose_selection_method()
-            parent1 = selection_method(population)
-            parent2 = selection_method(population)
-
+            population = new_population
+            if self.telemetry is not None:
+                self.telemetry.end_generation(generation, time.time() - start_time, population,
+                                              phase='steady_state' if use_steady else 'generational',
+                                              immigrant_frac=self.immigrant_frac)
+
+            if self.checkpoint is not None and time.time() - last_checkpoint >= self.checkpoint_interval_sec:
+                save_checkpoint(generation + 1)
+                last_checkpoint = time.time()
+            generation_sec[use_steady] = max(generation_sec[use_steady], time.time() - generation_start)
+        else:
+            generation = self.generations
+
+        if self.keep_final_state:
+            self.final_state = (population.ranked(), current_state(generation))
+        if self.checkpoint is not None:
+            self.checkpoint.remove()
+
+        best_solution = population.best
+        if self.solution_writer is not None and (best_fitness is None or best_solution.fitness_score > best_fitness):
+            self.solution_writer.submit(best_solution, time.time() - start_time)
+
+        self.gap = self.relative_gap(best_solution.fitness_score)
+        return self.expand(best_solution)
+
+    def past_deadline(self):
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def fill_up(self, new_population, population):
+        """Completes a generation cut short by the deadline with the best individuals of `population`."""
+        self.admit(population.ranked()[:self.population_size - len(new_population)], new_population,
+                   deduplicate=False)
+
+    def relative_gap(self, fitness):
+        """Share of `upper_bound` that `fitness` may still be missing."""
+        if self.upper_bound <= 0:
+            return 0.0
+        return (self.upper_bound - fitness) / self.upper_bound
+
+    def timer(self, section):
+        """Context manager that times `section` of a generation when telemetry is enabled."""
+        if self.telemetry is None:
+            return NO_TIMER
+        return self.telemetry.timer(section)
+
+    def new_population(self, individuals=()):
+        return Population(individuals, capacity=self.population_size, fingerprint=self.decoder.fingerprint)
+
+    def store(self, solution):
+        """Copy of `solution` as it is kept in the population."""
+        # Population members always carry their fingerprint
+        self.decoder.fingerprint(solution)
+        if self.compact_population:
+            if isinstance(solution, CompactSolution):
+                return solution
+            return CompactSolution.from_solution(solution, self.instance.num_books)
+        if isinstance(solution, CompactSolution):
+            return solution.to_solution()
+        # Offspring are not modified in place without `make_writable`, a clone is enough
+        return solution.clone()
+
+    def admit(self, offspring, population, deduplicate=True):
+        """
+        Stores the offspring whose fingerprint is not in `population` yet and adds
+        them to it. A full population evicts its worst individual for each of them.
+        """
+        for solution in offspring:
+            if deduplicate and self.deduplicate and population.has_fingerprint(self.decoder.fingerprint(solution)):
+                self.duplicates_rejected += 1
+                if self.telemetry is not None:
+                    self.telemetry.count('duplicates_rejected')
+                continue
+            population.add(self.store(solution))
+
+    @staticmethod
+    def expand(solution):
+        """`Solution` that tweaks can work on, for individuals taken from the population."""
+        if isinstance(solution, CompactSolution):
+            return solution.to_solution()
+        return solution
+
+    def create_offspring_pair(self, parent1, parent2):
+        with self.timer('crossover'):
             offspring1, offspring2 = self.crossover(parent1, parent2)
 
+        with self.timer('tweaks'):
             if random.random() < self.mutation_prob:
                 offspring1 = Tweaks.tweak_with_iterations(offspring1, self.instance, iterations=self.tweak_steps)
             if random.random() < self.mutation_prob:
                 offspring2 = Tweaks.tweak_with_iterations(offspring2, self.instance, iterations=self.tweak_steps)
 
-            new_population.extend([offspring1.shallow_copy(), offspring2.shallow_copy()])
+        if self.telemetry is not None:
+            self.telemetry.count('offspring', 2)
+        return offspring1, offspring2
 
-        return new_population
+    def create_offspring_generative(self, population):
+        if self.offspring_pool is not None:
+            return self.create_offspring_parallel(population)
+
+        new_population = self.new_population()
+        # Stop rejecting duplicates when the population has collapsed to a few solutions
+        max_attempts = 2 * self.population_size
+        attempts = 0
+        with self.timer('selection'):
+            selection_tables = SelectionTables(population.ranked())
+        while len(new_population) < self.population_size:
+            if self.past_deadline():
+                self.fill_up(new_population, population)
+                break
+            with self.timer('selection'):
+                selection_method = selection_tables.choose_selection_method()
+                parent1 = selection_method()
+                parent2 = selection_method()
 
-    def create_offspring_steady_state(self, population):
-        new_population = [population[0]]
+            offspring1, offspring2 = self.create_offspring_pair(parent1, parent2)
 
+            attempts += 1
+            self.admit((offspring1, offspring2), new_population, deduplicate=attempts <= max_attempts)
+
+        return new_population
+
+    def create_offspring_parallel(self, population):
+        """`create_offspring_generative` with the offspring pairs created by `offspring_pool`."""
+        new_population = self.new_population()
+        max_attempts = 2 * self.population_size
+        attempts = 0
+        with self.timer('selection'):
+            selection_tables = SelectionTables(population.ranked())
         while len(new_population) < self.population_size:
-            # Selection
-            selection_method = SelectionStrategies.choose_selection_method()
-            parent1 = selection_method(population)
-            parent2 = selection_method(population)
+            if self.past_deadline():
+                self.fill_up(new_population, population)
+                break
+            parent_pairs = []
+            with self.timer('selection'):
+                for _ in range((self.population_size - len(new_population) + 1) // 2):
+                    selection_method = selection_tables.choose_selection_method()
+                    parent_pairs.append((selection_method(), selection_method()))
+
+            with self.timer('offspring_pool'):
+                offspring = self.offspring_pool.create(parent_pairs)
+            if self.telemetry is not None:
+                self.telemetry.count('offspring', len(offspring))
+            attempts += len(parent_pairs)
+            self.admit(offspring, new_population, deduplicate=attempts <= max_attempts)
 
-            offspring1, offspring2 = self.crossover(parent1, parent2)
+        return new_population
 
-            if random.random() < self.mutation_prob:
-                offspring1 = Tweaks.tweak_with_iterations(offspring1, self.instance, iterations=self.tweak_steps)
-            if random.random() < self.mutation_prob:
-                offspring2 = Tweaks.tweak_with_iterations(offspring2, self.instance, iterations=self.tweak_steps)
+    def create_offspring_steady_state(self, population):
+        """One offspring pair that replaces the worst individuals it is better than."""
+        new_population = population.copy()
+        with self.timer('selection'):
+            selection_tables = SelectionTables(population.ranked())
+
+            selection_method = selection_tables.choose_selection_method()
+            parent1 = selection_method()
+            parent2 = selection_method()
 
-            # Combine the population with offspring and select the best ones
-            combined = population + [offspring1.shallow_copy(), offspring2.shallow_copy()]
-            new_population = sorted(combined, key=lambda x: x.fitness_score, reverse=True)[:self.population_size]
+        offspring1, offspring2 = self.create_offspring_pair(parent1, parent2)
+        self.admit((offspring1, offspring2), new_population)
 
         return new_population
 
     def initialize_population(self, initial_solution, tweak_ratio: float = 0.5):
-        population = [initial_solution.shallow_copy()]
+        """The initial solution, the seed solutions, tweaks of the initial solution until `deadline` and clones."""
+        seed = self.store(initial_solution)
+        population = [seed]
+        population.extend(self.store(solution) for solution in self.seed_solutions[:self.population_size - 1])
 
-        num_tweaked = int(self.population_size * tweak_ratio)
-        num_clones = self.population_size - num_tweaked - 1
+        num_tweaked = min(int(self.population_size * tweak_ratio), self.population_size - len(population))
 
         # Add tweaked solutions
         for _ in range(num_tweaked):
+            if self.past_deadline():
+                break
             tweaked = Tweaks.tweak_with_iterations(
                 initial_solution,
                 self.instance,
                 iterations=random.randint(1, self.tweak_steps)
             )
-            population.append(tweaked.shallow_copy())
+            population.append(self.store(tweaked))
 
-        # Add direct shallow clones
-        for _ in range(num_clones):
-            population.append(initial_solution.shallow_copy())
+        # Add direct copy-on-write clones
+        for _ in range(self.population_size - len(population)):
+            population.append(seed.clone() if isinstance(seed, Solution) else seed.shallow_copy())
 
         return population
 
@@ -188,6 +556,7 @@ class GeneticSolver:
             for idx in remaining_indices:
                 if p2_ptr < len(available_p2):
                     offspring_signed[idx] = available_p2[p2_ptr]
+                    used_libs.add(offspring_signed[idx])
                     p2_ptr += 1
                 else:
                     # Fallback to unused libraries from parent1
@@ -209,47 +578,16 @@ class GeneticSolver:
         try:
             offspring1_signed = create_offspring(parent1.signed_libraries, parent2.signed_libraries)
             offspring2_signed = create_offspring(parent2.signed_libraries, parent1.signed_libraries)
-
-            # Create complete solutions
-            def build_solution(signed_libs):
-                scanned_books = set()
-                scanned_per_lib = {}
-                used_libs = []
-
-                current_day = 0
-                for lib in signed_libs:
-                    lib_data = self.instance.libs[lib]
-                    if current_day + lib_data.signup_days > self.instance.num_days:
-                        continue
-
-                    current_day += lib_data.signup_days
-                    remaining_days = self.instance.num_days - current_day
-                    max_books = remaining_days * lib_data.books_per_day
-
-                    available_books = [b.id for b in lib_data.books if b.id not in scanned_books]
-                    available_books.sort(key=lambda x: self.instance.scores[x], reverse=True)
-                    selected = available_books[:max_books]
-
-                    if selected:
-                        scanned_books.update(selected)
-                        scanned_per_lib[lib] = selected
-                        used_libs.append(lib)
-
-                built = Solution(
-                    signed_libs=used_libs,
-                    unsigned_libs=list(set(range(self.instance.num_libs)) - set(used_libs)),
-                    scanned_books_per_library=scanned_per_lib,
-                    scanned_books=scanned_books
-                )
-
-                built.calculate_fitness_score(self.instance.scores)
-                return built
-
-            return (build_solution(offspring1_signed),
-                    build_solution(offspring2_signed))
-
-
         except ValueError as e:
             # Fallback to parents if crossover fails
             # print(f"Crossover failed: {e}, returning parents")
-            return parent1, parent2
+            return self.expand(parent1), self.expand(parent2)
+
+        # Create complete solutions, outside the fallback so that a broken order is not hidden
+        decoder = Decoder.for_instance(self.instance)
+
+        def build_solution(signed_libs):
+            return decoder.decode(signed_libs)
+
+        return (build_solution(offspring1_signed),
+                build_solution(offspring2_signed))
@@ -0,0 +1,116 @@
+import multiprocessing
+import queue
+import random
+
+import numpy as np
+
+from models.compact_solution import CompactSolution
+from models.decoder import Decoder
+from models.shared_instance import SharedInstance
+from models.tweaks import Tweaks
+
+
+class ImmigrantPool:
+    """
+    Immigrants for `GeneticSolver`, made on demand: `take(n)` returns exactly `n` of
+    them. Each immigrant comes from one of several constructors, picked by `WEIGHTS`:
+    - tweak: `Tweaks.tweak_with_iterations` of the seed solution
+    - grasp: the GRASP order of `InitialSolution.build_grasp_solution`, randomized by
+      adding noise of up to `grasp_p * num_libs` positions to each library's rank
+    - efficiency: libraries by score per signup day, scaled by log-normal noise
+
+    With `worker=True` a background process keeps up to `buffer_size` immigrants ready;
+    `take` uses those first and makes the rest itself, so it never waits.
+    """
+    WEIGHTS = {
+        'tweak': 2.0,
+        'grasp': 1.0,
+        'efficiency': 1.0,
+    }
+    BUFFER_SIZE = 16
+
+    def __init__(self, seed_solution, instance, tweak_steps=5, grasp_p=0.05, efficiency_noise=0.3,
+                 worker=False, buffer_size=BUFFER_SIZE):
+        self.seed_solution = seed_solution
+        self.instance = instance
+        self.tweak_steps = tweak_steps
+        self.grasp_p = grasp_p
+        self.efficiency_noise = efficiency_noise
+        self.decoder = Decoder.for_instance(instance)
+        self.constructors = [getattr(self, name) for name in ImmigrantPool.WEIGHTS]
+        self.weights = list(ImmigrantPool.WEIGHTS.values())
+
+        # Static library orders the randomized constructors start from
+        self.grasp_order = np.lexsort((-instance.library_scores(), instance.lib_signup_days))
+        self.efficiencies = ImmigrantPool.library_efficiency(instance)
+
+        self.shared = None
+        self.process = None
+        self.queue = None
+        if worker:
+            self.start_worker(buffer_size)
+
+    @staticmethod
+    def library_efficiency(instance):
+        """Score of the books a library could scan if it signed up first, per signup day."""
+        return instance.library_scores(reachable=True) / np.maximum(instance.lib_signup_days, 1)
+
+    def tweak(self):
+        return Tweaks.tweak_with_iterations(self.seed_solution, self.instance,
+                                            iterations=random.randint(1, self.tweak_steps))
+
+    def grasp(self):
+        window = max(1, int(len(self.grasp_order) * self.grasp_p))
+        rng = np.random.default_rng(random.getrandbits(64))
+        noisy_ranks = np.arange(len(self.grasp_order)) + rng.uniform(0, window, len(self.grasp_order))
+        return self.decoder.decode(self.grasp_order[np.argsort(noisy_ranks, kind='stable')].tolist(), [])
+
+    def efficiency(self):
+        rng = np.random.default_rng(random.getrandbits(64))
+        noisy_efficiency = self.efficiencies * rng.lognormal(0, self.efficiency_noise, len(self.efficiencies))
+        return self.decoder.decode(np.argsort(-noisy_efficiency, kind='stable').tolist(), [])
+
+    def make(self):
+        return random.choices(self.constructors, weights=self.weights, k=1)[0]()
+
+    def take(self, count):
+        immigrants = []
+        while self.queue is not None and len(immigrants) < count:
+            try:
+                immigrants.append(self.queue.get_nowait().to_solution())
+            except queue.Empty:
+                break
+        while len(immigrants) < count:
+            immigrants.append(self.make())
+        return immigrants
+
+    def start_worker(self, buffer_size):
+        context = multiprocessing.get_context()
+        self.shared = SharedInstance.publish(self.instance)
+        self.queue = context.Queue(maxsize=buffer_size)
+        seed_solution = CompactSolution.from_solution(self.seed_solution, self.instance.num_books)
+        self.process = context.Process(
+            target=ImmigrantPool.run_worker,
+            args=(self.shared.handle, seed_solution, self.queue, random.getrandbits(64),
+                  self.tweak_steps, self.grasp_p, self.efficiency_noise),
+            daemon=True)
+        self.process.start()
+
+    def close(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+            self.queue = None
+        if self.shared is not None:
+            self.shared.unlink()
+            self.shared = None
+
+    @staticmethod
+    def run_worker(instance_handle, seed_solution, immigrants, seed, tweak_steps, grasp_p, efficiency_noise):
+        random.seed(seed)
+        instance = SharedInstance.attach(instance_handle)
+        pool = ImmigrantPool(seed_solution.to_solution(), instance, tweak_steps, grasp_p, efficiency_noise)
+        while True:
+            # Blocks while the buffer is full, so only consumed immigrants are replaced
+            immigrants.put(CompactSolution.from_solution(pool.make(), instance.num_books))
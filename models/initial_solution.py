@@ -1,12 +1,22 @@
 import random
 import time
 import heapq
+from itertools import accumulate
+
+import numpy as np
+
+from models.decoder import Decoder
 from models.solution import Solution
 from models.library import Library
 from models.local_search import LocalSearch
+from models.weighted_efficiency_tuner import WeightedEfficiencyTuner
+from models.constructor_portfolio import ConstructorPortfolio
 
 
 class InitialSolution:
+    # Coarse parameter grid of `tune_weighted_efficiency_parameters`
+    WEIGHTED_EFFICIENCY_ALPHAS = [1.0, 0.5, 1.5, 2.0]
+    WEIGHTED_EFFICIENCY_BETAS = [0.0, 0.05, 0.1, 0.2]
 
     @staticmethod
     def generate_initial_solution_grasp(data, p=0.05, max_time=60):
@@ -35,13 +45,8 @@ class InitialSolution:
             key=lambda l: (l.signup_days, -sum(data.scores[b.id] for b in l.books)),
         )
 
-        signed_libraries = []
-        unsigned_libraries = []
-        scanned_books_per_library = {}
-        scanned_books = set()
-        curr_time = 0
-
         candidate_libs = libs_sorted[:]
+        order = []
 
         while candidate_libs:
             rcl_size = max(1, int(len(candidate_libs) * p))
@@ -49,34 +54,9 @@ class InitialSolution:
 
             chosen_lib = random.choice(rcl)
             candidate_libs.remove(chosen_lib)
+            order.append(chosen_lib.id)
 
-            if curr_time + chosen_lib.signup_days >= data.num_days:
-                unsigned_libraries.append(chosen_lib.id)
-            else:
-                time_left = data.num_days - (curr_time + chosen_lib.signup_days)
-                max_books_scanned = time_left * chosen_lib.books_per_day
-
-                available_books = sorted(
-                    {book.id for book in chosen_lib.books} - scanned_books,
-                    key=lambda b: -data.scores[b],
-                )[:max_books_scanned]
-
-                if available_books:
-                    signed_libraries.append(chosen_lib.id)
-                    scanned_books_per_library[chosen_lib.id] = available_books
-                    scanned_books.update(available_books)
-                    curr_time += chosen_lib.signup_days
-                else:
-                    unsigned_libraries.append(chosen_lib.id)
-
-        solution = Solution(
-            signed_libraries,
-            unsigned_libraries,
-            scanned_books_per_library,
-            scanned_books,
-        )
-        solution.calculate_fitness_score(data.scores)
-        return solution
+        return Decoder.for_instance(data).decode(order, [])
 
     @staticmethod
     def generate_initial_solution_sorted(data):
@@ -86,42 +66,7 @@ class InitialSolution:
             key=lambda l: (l.signup_days, -sum(data.scores[b.id] for b in l.books)),
         )
 
-        signed_libraries = []
-        unsigned_libraries = []
-        scanned_books_per_library = {}
-        scanned_books = set()
-        curr_time = 0
-
-        for library in sorted_libraries:
-            if curr_time + library.signup_days >= data.num_days:
-                unsigned_libraries.append(library.id)
-                continue
-
-            time_left = data.num_days - (curr_time + library.signup_days)
-            max_books_scanned = time_left * library.books_per_day
-
-            available_books = sorted(
-                {book.id for book in library.books} - scanned_books,
-                key=lambda b: -data.scores[b],
-            )[:max_books_scanned]
-
-            if available_books:
-                signed_libraries.append(library.id)
-                scanned_books_per_library[library.id] = available_books
-                scanned_books.update(available_books)
-                curr_time += library.signup_days
-            else:
-                unsigned_libraries.append(library.id)
-
-        solution = Solution(
-            signed_libraries,
-            unsigned_libraries,
-            scanned_books_per_library,
-            scanned_books,
-        )
-        solution.calculate_fitness_score(data.scores)
-
-        return solution
+        return Decoder.for_instance(data).decode([library.id for library in sorted_libraries], [])
 
     @staticmethod
     def generate_initial_solution_greedy(data):
@@ -178,6 +123,157 @@ class InitialSolution:
 
     @staticmethod
     def generate_initial_solution_weighted_efficiency(data, alpha=1, beta=0.1):
+        """
+        Repeatedly signs the library with the highest efficiency: the score of the best
+        unscanned books it can still scan, divided by
+        `signup_days ** alpha * (1 + beta * libraries signed so far)`.
+
+        Lazy (CELF) evaluation of `generate_initial_solution_weighted_efficiency_eager`,
+        with the same result. Scanning books and passing days only lower the score a
+        library can still scan, so a score computed in an earlier step bounds the
+        current one, and only the libraries at the top of a heap are evaluated again.
+        Libraries with the same signup days share the divisor, so one heap per signup
+        days orders them by score alone; a second heap orders these groups by
+        score / signup_days ** alpha. A library's unscanned books and their prefix sums
+        are rebuilt only when one of its books was scanned, found through the
+        book -> library index.
+        """
+        if beta < 0:
+            # The divisor can reach zero and turn the order of the groups around
+            return InitialSolution.generate_initial_solution_weighted_efficiency_eager(data, alpha, beta)
+
+        num_days = data.num_days
+        scores = data.scores
+        signup_days = data.lib_signup_days.tolist()
+        books_per_day = data.lib_books_per_day.tolist()
+        book_lib_offsets = data.book_lib_offsets
+        book_lib_ids = data.book_lib_ids
+
+        mask = bytearray(data.num_books)
+        unscanned = [None] * data.num_libs
+        unscanned_scores = [None] * data.num_libs
+        dirty = [True] * data.num_libs
+
+        def library_score(lib_id, curr_time):
+            """Score of the best unscanned books the library can still scan, 0 if none."""
+            time_left = num_days - (curr_time + signup_days[lib_id])
+            if time_left <= 0:
+                return 0
+            if dirty[lib_id]:
+                books = unscanned[lib_id]
+                if books is None:
+                    books = data.library_books(lib_id).tolist()
+                books = [book for book in books if not mask[book]]
+                unscanned[lib_id] = books
+                unscanned_scores[lib_id] = [0, *accumulate(scores[book] for book in books)]
+                dirty[lib_id] = False
+            return unscanned_scores[lib_id][min(time_left * books_per_day[lib_id], len(unscanned[lib_id]))]
+
+        # Per signup days: (-score, library, signed libraries when the score was computed),
+        # ties go to the lowest library id, like the first maximum of the eager scan
+        group_ids = {}
+        group_heaps = []
+        group_penalties = []
+        for lib_id in range(data.num_libs):
+            score = library_score(lib_id, 0)
+            if not score:
+                continue
+            group = group_ids.get(signup_days[lib_id])
+            if group is None:
+                group = group_ids[signup_days[lib_id]] = len(group_heaps)
+                group_heaps.append([])
+                group_penalties.append(signup_days[lib_id] ** alpha)
+            group_heaps[group].append((-score, lib_id, 0))
+        for heap in group_heaps:
+            heapq.heapify(heap)
+
+        def group_top(group, curr_time, used):
+            """Brings the top library of a group up to date, returns its score (0 if the group is empty)."""
+            heap = group_heaps[group]
+            while heap:
+                neg_score, lib_id, evaluated = heap[0]
+                if evaluated == used:
+                    return -neg_score
+                score = library_score(lib_id, curr_time)
+                if score:
+                    heapq.heapreplace(heap, (-score, lib_id, used))
+                else:
+                    heapq.heappop(heap)
+            return 0
+
+        # (-score / signup_days ** alpha of the group's top library, group, signed libraries)
+        groups = [(group_heaps[group][0][0] / group_penalties[group], group, 0) for group in range(len(group_heaps))]
+        heapq.heapify(groups)
+
+        curr_time = 0
+        scanned_books = set()
+        scanned_per_lib = {}
+        signed_libs = []
+        unsigned_libs = []
+
+        used = 0
+        while groups and curr_time < num_days:
+            _, group, evaluated = groups[0]
+            if evaluated != used:
+                score = group_top(group, curr_time, used)
+                if score:
+                    heapq.heapreplace(groups, (-score / group_penalties[group], group, used))
+                else:
+                    heapq.heappop(groups)
+                continue
+
+            # Rounding can order groups with (nearly) equal ratios differently than the
+            # efficiencies do, so all of them are compared on the efficiency itself
+            threshold = -groups[0][0] * (1 - 1e-9)
+            candidates = []
+            while groups and -groups[0][0] >= threshold:
+                entry = heapq.heappop(groups)
+                group = entry[1]
+                if entry[2] == used:
+                    candidates.append(entry)
+                    continue
+                score = group_top(group, curr_time, used)
+                if score:
+                    heapq.heappush(groups, (-score / group_penalties[group], group, used))
+
+            best = None
+            for entry in candidates:
+                group = entry[1]
+                neg_score, lib_id, _ = group_heaps[group][0]
+                efficiency = -neg_score / (group_penalties[group] * (1 + beta * used))
+                if best is None or efficiency > best[0] or (efficiency == best[0] and lib_id < best[1]):
+                    best = (efficiency, lib_id, entry)
+            _, lib_id, best_entry = best
+            heapq.heappop(group_heaps[best_entry[1]])
+            for entry in candidates:
+                # The old ratio still bounds the group
+                if entry is not best_entry or group_heaps[entry[1]]:
+                    heapq.heappush(groups, entry)
+
+            time_left = num_days - (curr_time + signup_days[lib_id])
+            best_books = unscanned[lib_id][:time_left * books_per_day[lib_id]]
+            signed_libs.append(lib_id)
+            scanned_per_lib[lib_id] = best_books
+            scanned_books.update(best_books)
+            for book in best_books:
+                mask[book] = 1
+            # Only the libraries that hold one of the scanned books lose books
+            books = np.array(best_books, dtype=np.int64)
+            starts = book_lib_offsets[books]
+            counts = book_lib_offsets[books + 1] - starts
+            positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            for other in np.unique(book_lib_ids[positions]).tolist():
+                dirty[other] = True
+            curr_time += signup_days[lib_id]
+            used += 1
+
+        sol = Solution(signed_libs, unsigned_libs, scanned_per_lib, scanned_books)
+        sol.calculate_fitness_score(data.scores)
+        return sol
+
+    @staticmethod
+    def generate_initial_solution_weighted_efficiency_eager(data, alpha=1, beta=0.1):
+        """Rescores every remaining library in every step, see `generate_initial_solution_weighted_efficiency`."""
         Library._id_counter = 0
         libs = data.libs[:]
         curr_time = 0
@@ -219,35 +315,13 @@ class InitialSolution:
         return sol
 
     @staticmethod
-    def tune_weighted_efficiency_parameters(data, time_limit=60):
-        start_time = time.time()
-        best_score = 0
-        best_alpha = 1.0
-        best_beta = 0.1
-        best_solution = None
-
-        alpha_values = [1.0, 0.5, 1.5, 2.0]
-        beta_values = [0.0, 0.05, 0.1, 0.2]
-
-        for alpha in alpha_values:
-            for beta in beta_values:
-                if time.time() - start_time >= time_limit:
-                    return best_alpha, best_beta, best_score, best_solution
-
-                solution = (
-                    InitialSolution.generate_initial_solution_weighted_efficiency(
-                        data, alpha=alpha, beta=beta
-                    )
-                )
-                score = solution.fitness_score
-
-                if score > best_score:
-                    best_score = score
-                    best_alpha = alpha
-                    best_beta = beta
-                    best_solution = solution
-
-        return best_alpha, best_beta, best_score, best_solution
+    def tune_weighted_efficiency_parameters(data, time_limit=60, workers=0):
+        """
+        Best (alpha, beta, score, solution) of the weighted efficiency constructor found
+        within `time_limit`: the coarse grid first, then finer and wider points around
+        the best one, on `workers` processes if `workers > 0`. See `WeightedEfficiencyTuner`.
+        """
+        return WeightedEfficiencyTuner(data, time_limit=time_limit, workers=workers).run()
 
     @staticmethod
     def generate_initial_greedy_heap(data):
@@ -363,13 +437,13 @@ class InitialSolution:
         return solution
 
     @staticmethod
-    def generate_initial_solution(data):
+    def generate_initial_solution(data, workers=0):
         best_solution = None
         # print("\nGenerating solutions using different methods:")
         # print("-" * 50)
 
         best_alpha, best_beta, best_score, weighted_solution = (
-            InitialSolution.tune_weighted_efficiency_parameters(data, time_limit=60)
+            InitialSolution.tune_weighted_efficiency_parameters(data, time_limit=60, workers=workers)
         )
         # print(f"\nWeighted Efficiency Solution:")
         # print(f"Score: {weighted_solution.fitness_score}")
@@ -418,4 +492,13 @@ class InitialSolution:
         if best_solution is None:
             raise Exception("No valid initial solution could be generated")
 
-        return best_solution
\ No newline at end of file
+        return best_solution
+
+    @staticmethod
+    def generate_initial_solution_portfolio(data, time_limit=60):
+        """
+        Portfolio mode of `generate_initial_solution`: all constructors run at the same
+        time in worker processes and stop at `time_limit`. Returns the best solution and
+        the other good ones as seeds for the GA population, see `ConstructorPortfolio`.
+        """
+        return ConstructorPortfolio(data, time_limit=time_limit).run()
@@ -0,0 +1,72 @@
+import hashlib
+import os
+import zipfile
+
+import numpy as np
+
+from .instance_data import InstanceData
+from .parser import Parser
+
+
+class InstanceCache:
+    """
+    Binary cache of parsed instances. The CSR arrays of an instance are stored in an
+    uncompressed `.npz` file next to the input, together with a hash of the input file.
+    A cache entry is only used while that hash still matches; missing, stale or
+    unreadable entries are rebuilt through `Parser`.
+    """
+    FORMAT_VERSION = 3
+    SUFFIX = '.npz'
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.cache_path = file_path + InstanceCache.SUFFIX
+
+    @staticmethod
+    def source_hash(file_path):
+        with open(file_path, 'rb') as file:
+            return hashlib.blake2b(file.read(), digest_size=20).hexdigest()
+
+    def load(self):
+        try:
+            digest = InstanceCache.source_hash(self.file_path)
+        except OSError:
+            # Let the parser report the missing or unreadable input
+            return Parser(self.file_path).parse_fast()
+
+        instance = self._read(digest)
+        if instance is None:
+            instance = Parser(self.file_path).parse_fast()
+            self._write(instance, digest)
+        return instance
+
+    def _read(self, digest):
+        try:
+            with np.load(self.cache_path, allow_pickle=False) as cached:
+                if int(cached['format_version']) != InstanceCache.FORMAT_VERSION:
+                    return None
+                if str(cached['source_hash']) != digest:
+                    return None
+                return InstanceData.from_arrays(
+                    int(cached['num_days']),
+                    *(cached[name] for name in InstanceData.ARRAYS)
+                )
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            return None
+
+    def _write(self, instance, digest):
+        tmp_path = f'{self.cache_path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as file:
+                np.savez(
+                    file,
+                    format_version=np.int64(InstanceCache.FORMAT_VERSION),
+                    source_hash=np.str_(digest),
+                    num_days=np.int64(instance.num_days),
+                    **{name: getattr(instance, name) for name in InstanceData.ARRAYS}
+                )
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            # A read-only input directory only costs us the cache
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -1,3 +1,61 @@
+from collections.abc import Sequence
+
+import numpy as np
+
+from .book import Book
+from .library import Library
+
+
+class LibraryView(Sequence):
+    """
+    Read-only list of `Library` objects over the CSR arrays of an `InstanceData`.
+    A library (and the `Book` objects of the instance) is only built the first
+    time it is accessed.
+    """
+
+    def __init__(self, instance):
+        self._instance = instance
+        self._libs = [None] * instance.num_libs
+        self._books = None
+
+    def __len__(self):
+        return len(self._libs)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._libs)))]
+
+        library = self._libs[index]
+        if library is None:
+            data = self._instance
+            if self._books is None:
+                self._books = [Book(book_id, score) for book_id, score in enumerate(data.scores)]
+            lib_id = index % len(self._libs)
+            lib_books = list(map(self._books.__getitem__, data.library_books(lib_id).tolist()))
+            library = Library.from_sorted_books(lib_id,
+                                                int(data.lib_num_books[lib_id]),
+                                                int(data.lib_signup_days[lib_id]),
+                                                int(data.lib_books_per_day[lib_id]),
+                                                lib_books)
+            self._libs[lib_id] = library
+        return library
+
+
+class BookLibrariesView(Sequence):
+    """Read-only `book_libs` over the book -> library CSR arrays of an `InstanceData`."""
+
+    def __init__(self, instance):
+        self._instance = instance
+
+    def __len__(self):
+        return self._instance.num_books
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._instance.book_libraries(index).tolist()
+
+
 class InstanceData:
     num_books = 0
     num_libs = 0
@@ -7,6 +65,23 @@ class InstanceData:
     book_libs = []
     upper_bound = 0
 
+    # Array layout, available for every instance:
+    #   score_array                                   - score of every book
+    #   lib_num_books, lib_signup_days, lib_books_per_day - one entry per library
+    #   lib_book_offsets, lib_book_ids                - CSR library -> books, sorted by score (highest first)
+    #   book_lib_offsets, book_lib_ids                - CSR book -> libraries, ascending library ids
+    # These attributes in `from_arrays` order, as `InstanceCache` stores and `SharedInstance` publishes them
+    ARRAYS = (
+        'score_array',
+        'lib_num_books',
+        'lib_signup_days',
+        'lib_books_per_day',
+        'lib_book_offsets',
+        'lib_book_ids',
+        'book_lib_offsets',
+        'book_lib_ids',
+    )
+
     def __init__(self, num_books, num_libs, num_days, scores, libs):
         self.num_books = num_books
         self.num_libs = num_libs
@@ -18,6 +93,61 @@ class InstanceData:
             for book in lib.books:
                 self.book_libs[book.id].append(i)
 
+        self.score_array = np.asarray(scores, dtype=np.int64)
+        self.lib_num_books = np.array([lib.num_books for lib in libs], dtype=np.int64)
+        self.lib_signup_days = np.array([lib.signup_days for lib in libs], dtype=np.int64)
+        self.lib_books_per_day = np.array([lib.books_per_day for lib in libs], dtype=np.int64)
+        self.lib_book_offsets = np.zeros(num_libs + 1, dtype=np.int64)
+        np.cumsum([len(lib.books) for lib in libs], out=self.lib_book_offsets[1:])
+        self.lib_book_ids = np.fromiter((book.id for lib in libs for book in lib.books),
+                                        dtype=np.int32, count=int(self.lib_book_offsets[-1]))
+        self._build_book_index()
+
+    @classmethod
+    def from_arrays(cls, num_days, scores, lib_num_books, lib_signup_days, lib_books_per_day,
+                    lib_book_offsets, lib_book_ids, book_lib_offsets=None, book_lib_ids=None):
+        """
+        Builds an array-backed instance. The books of library i are
+        `lib_book_ids[lib_book_offsets[i]:lib_book_offsets[i + 1]]`, already sorted by
+        score (highest first). The book -> library index is derived when it is not given.
+        `libs` and `book_libs` are views that build Python objects only on access.
+        """
+        instance = cls.__new__(cls)
+        instance.num_books = len(scores)
+        instance.num_libs = len(lib_num_books)
+        instance.num_days = num_days
+        instance.scores = scores.tolist()
+
+        instance.score_array = scores
+        instance.lib_num_books = lib_num_books
+        instance.lib_signup_days = lib_signup_days
+        instance.lib_books_per_day = lib_books_per_day
+        instance.lib_book_offsets = lib_book_offsets
+        instance.lib_book_ids = lib_book_ids
+        if book_lib_offsets is None or book_lib_ids is None:
+            instance._build_book_index()
+        else:
+            instance.book_lib_offsets = book_lib_offsets
+            instance.book_lib_ids = book_lib_ids
+
+        instance.libs = LibraryView(instance)
+        instance.book_libs = BookLibrariesView(instance)
+        return instance
+
+    def _build_book_index(self):
+        lib_of_book = np.repeat(np.arange(self.num_libs, dtype=np.int32), np.diff(self.lib_book_offsets))
+        by_book = np.argsort(self.lib_book_ids, kind='stable')
+        self.book_lib_ids = lib_of_book[by_book]
+        self.book_lib_offsets = np.searchsorted(self.lib_book_ids[by_book], np.arange(self.num_books + 1))
+
+    def library_books(self, lib_id):
+        """Book ids of a library, sorted by score (highest first)."""
+        return self.lib_book_ids[self.lib_book_offsets[lib_id]:self.lib_book_offsets[lib_id + 1]]
+
+    def book_libraries(self, book_id):
+        """Ids of the libraries that hold a book, in ascending order."""
+        return self.book_lib_ids[self.book_lib_offsets[book_id]:self.book_lib_offsets[book_id + 1]]
+
     def describe(self):
         print('There are', self.num_books, "books", self.num_libs, "libraries", "and", self.num_days, "days for scanning")
         print('The scores of the books are', ','.join(str(x) for x in self.scores), "(in order)")
@@ -33,16 +163,64 @@ class InstanceData:
         for i,l in enumerate(self.book_libs):
             print(f'Book {i} Exists in Libraries:', ' and '.join(str(x) for x in l))
             
+    def library_scores(self, reachable=False):
+        """
+        Total score of the books of every library. With `reachable`, only of the books
+        it could scan if it signed up first: its top `(num_days - signup_days) * books_per_day`.
+        """
+        offsets = self.lib_book_offsets
+        book_scores = np.concatenate(([0], np.cumsum(self.score_array[self.lib_book_ids], dtype=np.int64)))
+        ends = offsets[1:]
+        if reachable:
+            capacity = np.maximum(self.num_days - self.lib_signup_days, 0).astype(np.int64) * self.lib_books_per_day
+            ends = np.minimum(offsets[:-1] + capacity, ends)
+        return book_scores[ends] - book_scores[offsets[:-1]]
+
     def calculate_upper_bound(self):
         """Calculates the sum of scores of all unique books across all libraries."""
-        unique_books = set()
-        
-        # Collect all unique book IDs
-        for lib in self.libs:
-            for book in lib.books:
-                unique_books.add(book.id)  
+        unique_books = np.unique(self.lib_book_ids)
+        return int(self.score_array[unique_books].sum())
+
+    def calculate_tight_upper_bound(self):
+        """
+        Upper bound that also accounts for the signup days and the daily capacity of
+        the libraries, the smallest of:
+        - `calculate_upper_bound`
+        - a fractional knapsack: a library can scan at most its top
+          `(num_days - signup_days) * books_per_day` books, and the libraries that scan
+          anything sign up within `num_days - 1` days together
+        - the highest scoring unique books, as many as can be scanned: the j-th library
+          to sign up starts scanning no earlier than the sum of the j smallest signup
+          days, and scans at most the largest `books_per_day` and library size allow
+        """
+        knapsack_bound = InstanceData._fractional_knapsack(self.lib_signup_days, self.library_scores(reachable=True),
+                                                           self.num_days - 1)
+
+        max_books = 0
+        if self.num_libs > 0:
+            scanning_days = np.maximum(self.num_days - np.cumsum(np.sort(self.lib_signup_days)), 0)
+            max_books = int(np.minimum(scanning_days * self.lib_books_per_day.max(), self.lib_num_books.max()).sum())
+        unique_scores = np.sort(self.score_array[np.unique(self.lib_book_ids)])[::-1]
+        books_bound = int(unique_scores[:max_books].sum())
+
+        return min(self.calculate_upper_bound(), knapsack_bound, books_bound)
 
-        # Sum up their scores
-        upper_bound = sum(self.scores[book_id] for book_id in unique_books)
-        return upper_bound
+    @staticmethod
+    def _fractional_knapsack(weights, values, capacity):
+        """Optimum of the LP relaxation of the 0/1 knapsack, rounded down."""
+        if capacity < 0:
+            return 0
+        useful = values > 0
+        weights, values = weights[useful], values[useful]
+        # Zero-weight items always fit; the others by value per unit of weight
+        ratio = np.divide(values, weights, out=np.full(len(values), np.inf), where=weights > 0)
+        order = np.argsort(-ratio, kind='stable')
+        weights, values = weights[order], values[order]
 
+        used = np.cumsum(weights)
+        taken = int(np.searchsorted(used, capacity, side='right'))
+        total = int(values[:taken].sum())
+        if taken < len(values):
+            remaining = capacity - (int(used[taken - 1]) if taken else 0)
+            total += int(values[taken]) * remaining // int(weights[taken])
+        return total
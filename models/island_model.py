@@ -0,0 +1,217 @@
+import multiprocessing
+import queue
+import random
+import threading
+import time
+
+from models.compact_solution import CompactSolution
+from models.genetic_solver import GeneticSolver
+from models.shared_instance import SharedInstance
+
+
+class IslandModel:
+    """
+    Runs one `GeneticSolver` population per process. Every `migration_interval`
+    generations (or `migration_time` seconds) each island sends its best
+    `num_migrants` individuals to its neighbours in `topology`, where they replace
+    the worst individuals. The instance is published once through `SharedInstance`
+    and only `CompactSolution` encodings travel between processes.
+
+    Usage:
+    islands = IslandModel(initial_solution, instance, num_islands=8, topology='ring',
+                          island_params=[{'mutation_prob': 0.2}, {'mutation_prob': 0.5}])
+    solution = islands.solve()      # best solution over all islands
+    """
+    TOPOLOGIES = ('ring', 'fully_connected')
+    # `GeneticSolver` options that start worker processes, which daemonic islands cannot do
+    PROCESS_PARAMS = ('offspring_workers', 'immigrant_worker')
+    # How long `solve` waits past `time_limit_sec` for the islands to exit before terminating them
+    DEADLINE_GRACE_SEC = 5
+
+    def __init__(self,
+                 initial_solution,
+                 instance,
+                 num_islands=4,
+                 topology='ring',
+                 migration_interval=10,
+                 migration_time=None,
+                 num_migrants=2,
+                 time_limit_sec=10 * 60,
+                 island_params=None,
+                 seed=None,
+                 seed_solutions=(),
+                 **solver_params
+                 ):
+        if topology not in IslandModel.TOPOLOGIES:
+            raise ValueError(f"Unknown topology '{topology}', expected one of {IslandModel.TOPOLOGIES}")
+        for params in [solver_params] + list(island_params or []):
+            used = [name for name in IslandModel.PROCESS_PARAMS if params.get(name)]
+            if used:
+                raise ValueError(f"Islands run as daemon processes and cannot use {used}")
+
+        self.initial_solution = initial_solution
+        self.instance = instance
+        self.num_islands = num_islands
+        self.topology = topology
+        self.migration_interval = migration_interval
+        self.migration_time = migration_time
+        self.num_migrants = num_migrants
+        self.time_limit_sec = time_limit_sec
+        # Per-island `GeneticSolver` arguments, applied on top of `solver_params` (cycled)
+        self.island_params = island_params or [{}]
+        self.seed = seed if seed is not None else random.randrange(1 << 30)
+        # `GeneticSolver.seed_solutions` of every island
+        self.seed_solutions = list(seed_solutions)
+        self.solver_params = solver_params
+        # Best fitness per island that reported in time, filled by `solve`
+        self.island_scores = []
+
+    @staticmethod
+    def neighbours(island, num_islands, topology):
+        """Islands that `island` sends its migrants to."""
+        if num_islands < 2:
+            return []
+        if topology == 'ring':
+            return [(island + 1) % num_islands]
+        return [other for other in range(num_islands) if other != island]
+
+    def island_config(self, island):
+        solver_params = dict(self.solver_params)
+        solver_params.update(self.island_params[island % len(self.island_params)])
+        solver_params['time_limit_sec'] = self.time_limit_sec
+        return {
+            'seed': self.seed + island,
+            'neighbours': IslandModel.neighbours(island, self.num_islands, self.topology),
+            'migration_interval': self.migration_interval,
+            'migration_time': self.migration_time,
+            'num_migrants': self.num_migrants,
+            'num_islands': self.num_islands,
+            'solver_params': solver_params,
+        }
+
+    def solve(self):
+        context = multiprocessing.get_context()
+        shared = SharedInstance.publish(self.instance)
+        inboxes = [context.Queue() for _ in range(self.num_islands)]
+        results = context.Queue()
+        # Number of islands whose outgoing migrants have all been written, see `IslandMigration.close`
+        flushed = context.Value('i', 0)
+        initial_solution = CompactSolution.from_solution(self.initial_solution, self.instance.num_books)
+        seed_solutions = [CompactSolution.from_solution(solution, self.instance.num_books)
+                          for solution in self.seed_solutions]
+
+        processes = [
+            context.Process(target=IslandModel.run_island,
+                            args=(island, shared.handle, initial_solution, seed_solutions, inboxes, results,
+                                  flushed, self.island_config(island)),
+                            daemon=True)
+            for island in range(self.num_islands)
+        ]
+
+        best_solutions = {}
+        deadline = time.time() + self.time_limit_sec + IslandModel.DEADLINE_GRACE_SEC
+        try:
+            for process in processes:
+                process.start()
+
+            while len(best_solutions) < self.num_islands and time.time() < deadline:
+                try:
+                    island, solution = results.get(timeout=min(1.0, max(0.0, deadline - time.time())))
+                    best_solutions[island] = solution
+                except queue.Empty:
+                    failed = [island for island, process in enumerate(processes)
+                              if island not in best_solutions and process.exitcode not in (None, 0)]
+                    if failed:
+                        raise RuntimeError(f"Islands {failed} exited without a result")
+
+            for process in processes:
+                process.join(timeout=max(0.0, deadline - time.time()))
+        finally:
+            for process in processes:
+                # Islands that missed the deadline are terminated, their result is lost
+                if process.is_alive():
+                    process.terminate()
+            shared.unlink()
+
+        if not best_solutions:
+            raise RuntimeError(f"No island finished within {self.time_limit_sec} seconds")
+        self.island_scores = [solution.fitness_score for _, solution in sorted(best_solutions.items())]
+        return max(best_solutions.values(), key=lambda x: x.fitness_score).to_solution()
+
+    @staticmethod
+    def run_island(island, instance_handle, initial_solution, seed_solutions, inboxes, results, flushed, config):
+        # The GA clock starts after the population initialization, the deadline counts it too
+        deadline = time.time() + config['solver_params']['time_limit_sec']
+        random.seed(config['seed'])
+        instance = SharedInstance.attach(instance_handle)
+
+        migration = IslandMigration(inboxes[island], [inboxes[other] for other in config['neighbours']],
+                                    instance.num_books, config['migration_interval'],
+                                    config['migration_time'], config['num_migrants'])
+        solver = GeneticSolver(initial_solution.to_solution(), instance, migration=migration,
+                               seed_solutions=[solution.to_solution() for solution in seed_solutions],
+                               **config['solver_params'])
+        best_solution = solver.solve(deadline=deadline)
+        results.put((island, CompactSolution.from_solution(best_solution, instance.num_books)))
+        migration.close(flushed, config['num_islands'])
+
+
+class IslandMigration:
+    """`GeneticSolver.migration` hook of one island, see `IslandModel`."""
+    DRAIN_INTERVAL_SEC = 0.01
+
+    def __init__(self, inbox, outboxes, num_books, interval, time_interval=None, num_migrants=2):
+        self.inbox = inbox
+        self.outboxes = outboxes
+        self.num_books = num_books
+        self.interval = interval
+        self.time_interval = time_interval
+        self.num_migrants = num_migrants
+        self.last_sent = time.time()
+
+    def __call__(self, generation, elapsed, population):
+        due = (self.interval and (generation + 1) % self.interval == 0) or \
+              (self.time_interval is not None and time.time() - self.last_sent >= self.time_interval)
+        if due and self.outboxes:
+            # `population` is sorted best first
+            migrants = [
+                solution if isinstance(solution, CompactSolution)
+                else CompactSolution.from_solution(solution, self.num_books)
+                for solution in population[:self.num_migrants]
+            ]
+            for outbox in self.outboxes:
+                outbox.put(migrants)
+            self.last_sent = time.time()
+
+        return self.receive()
+
+    def receive(self):
+        received = []
+        while True:
+            try:
+                received.extend(self.inbox.get_nowait())
+            except queue.Empty:
+                return received
+
+    def close(self, flushed, num_islands):
+        """
+        Called once the island has finished. Keeps draining the inbox until every island
+        has written all of its migrants, so no island exits in the middle of a write (which
+        would leave a partial message and a held lock in a neighbour's inbox) and no writer
+        blocks on the pipe of an island that stopped reading.
+        """
+        for outbox in self.outboxes:
+            outbox.close()
+        writer = threading.Thread(target=lambda: [outbox.join_thread() for outbox in self.outboxes], daemon=True)
+        writer.start()
+
+        counted = False
+        while True:
+            self.receive()
+            if not counted and not writer.is_alive():
+                with flushed.get_lock():
+                    flushed.value += 1
+                counted = True
+            if counted and flushed.value >= num_islands:
+                return
+            time.sleep(IslandMigration.DRAIN_INTERVAL_SEC)
@@ -16,5 +16,16 @@ class Library:
         self.books_per_day = books_per_day
         self.books = sorted([Book(x, book_scores[x]) for x in books], key=lambda x: x.score, reverse=True)
 
+    @classmethod
+    def from_sorted_books(cls, id, num_books, signup_days, books_per_day, books):
+        """Builds a library from `Book` objects that are already sorted by score (highest first)."""
+        library = cls.__new__(cls)
+        library.id = id
+        library.num_books = num_books
+        library.signup_days = signup_days
+        library.books_per_day = books_per_day
+        library.books = books
+        return library
+
     def __repr__(self):
         return f"Library({self.id}, {self.num_books}, {self.signup_days}, {self.books_per_day}, {self.books})"
\ No newline at end of file
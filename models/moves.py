@@ -0,0 +1,172 @@
+import random
+
+from models.decoder import Decoder
+
+
+class UndoLog:
+    """Steps that revert a move, applied in reverse order by `rollback`."""
+
+    def __init__(self):
+        self.steps = []
+
+    def push(self, undo, *args):
+        self.steps.append((undo, args))
+
+    def rollback(self):
+        for undo, args in reversed(self.steps):
+            undo(*args)
+
+
+class Moves:
+    """
+    In-place counterparts of the `Tweaks` that reorder libraries. A move draws the
+    same random choices as its tweak, changes the solution in place and returns an
+    `UndoLog` that restores it, or None if the move did not change anything.
+
+    The solution must own its containers, call `Solution.make_writable` first.
+    """
+
+    @staticmethod
+    def get_moves():
+        """Tweak -> move that applies it in place"""
+        # Imported here, `Tweaks` uses `Moves` to evaluate its tweaks
+        from models.tweaks import Tweaks
+
+        return {
+            Tweaks.tweak_solution_swap_signed: Moves.swap_signed,
+            Tweaks.tweak_solution_swap_signed_with_unsigned: Moves.swap_signed_with_unsigned,
+            Tweaks.tweak_solution_swap_same_books: Moves.swap_same_books,
+            Tweaks.tweak_solution_swap_neighbor_libraries: Moves.swap_neighbor_libraries,
+            Tweaks.tweak_solution_insert_library: Moves.insert_library,
+            Tweaks.tweak_solution_swap_last_book: Moves.swap_last_book,
+        }
+
+    @staticmethod
+    def redecode(solution, data, start, suffix, undo_log=None):
+        """Decodes `signed_libraries[:start] + suffix` in place and records how to revert it."""
+        undo_log = undo_log or UndoLog()
+        decoder = Decoder.for_instance(data)
+        undo_log.push(decoder.rollback, solution, decoder.redecode_in_place(solution, start, suffix))
+        return undo_log
+
+    @staticmethod
+    def swap_signed(solution, data):
+        signed_libraries = solution.signed_libraries
+        if len(signed_libraries) < 2:
+            return None
+
+        idx1, idx2 = sorted(random.sample(range(len(signed_libraries)), 2))
+        suffix = ([signed_libraries[idx2]] + signed_libraries[idx1 + 1:idx2] +
+                  [signed_libraries[idx1]] + signed_libraries[idx2 + 1:])
+        return Moves.redecode(solution, data, idx1, suffix)
+
+    @staticmethod
+    def swap_signed_with_unsigned(solution, data):
+        signed_libraries = solution.signed_libraries
+        unsigned_libraries = solution.unsigned_libraries
+        if not signed_libraries or not unsigned_libraries:
+            return None
+
+        signed_idx = random.randint(0, len(signed_libraries) - 1)
+        unsigned_idx = random.randint(0, len(unsigned_libraries) - 1)
+
+        undo_log = UndoLog()
+        new_lib_id = unsigned_libraries[unsigned_idx]
+        unsigned_libraries[unsigned_idx] = signed_libraries[signed_idx]
+        undo_log.push(unsigned_libraries.__setitem__, unsigned_idx, new_lib_id)
+
+        return Moves.redecode(solution, data, signed_idx, [new_lib_id] + signed_libraries[signed_idx + 1:], undo_log)
+
+    @staticmethod
+    def swap_same_books(solution, data):
+        signed_libraries = solution.signed_libraries
+        if len(signed_libraries) < 2:
+            return None
+
+        idx1 = random.randint(0, len(signed_libraries) - 1)
+        idx2 = random.randint(0, len(signed_libraries) - 1)
+        while idx1 == idx2:
+            idx2 = random.randint(0, len(signed_libraries) - 1)
+        idx1, idx2 = min(idx1, idx2), max(idx1, idx2)
+
+        suffix = ([signed_libraries[idx2]] + signed_libraries[idx1 + 1:idx2] +
+                  [signed_libraries[idx1]] + signed_libraries[idx2 + 1:])
+        return Moves.redecode(solution, data, idx1, suffix)
+
+    @staticmethod
+    def swap_neighbor_libraries(solution, data):
+        signed_libraries = solution.signed_libraries
+        if len(signed_libraries) < 2:
+            return None
+
+        pos = random.randint(0, len(signed_libraries) - 2)
+        suffix = [signed_libraries[pos + 1], signed_libraries[pos]] + signed_libraries[pos + 2:]
+        return Moves.redecode(solution, data, pos, suffix)
+
+    @staticmethod
+    def insert_library(solution, data):
+        signed_libraries = solution.signed_libraries
+        unsigned_libraries = solution.unsigned_libraries
+        if not unsigned_libraries:
+            return None
+
+        unsigned_idx = random.randint(0, len(unsigned_libraries) - 1)
+        new_lib_id = unsigned_libraries.pop(unsigned_idx)
+        undo_log = UndoLog()
+        undo_log.push(unsigned_libraries.insert, unsigned_idx, new_lib_id)
+
+        insert_pos = random.randint(0, len(signed_libraries))
+        return Moves.redecode(solution, data, insert_pos, [new_lib_id] + signed_libraries[insert_pos:], undo_log)
+
+    @staticmethod
+    def last_book_swap(solution, data):
+        """
+        `(lib_id, last_book, new_book)` for a random signed library whose best book that is
+        not scanned anywhere scores strictly higher than its last scanned book, or None.
+        Library books are ranked best first, so this mostly finds nothing, and a tie is
+        not worth losing the decode checkpoints for.
+        """
+        if not solution.signed_libraries:
+            return None
+
+        lib_id = random.choice(solution.signed_libraries)
+        scanned_books = solution.scanned_books_per_library.get(lib_id, [])
+        if not scanned_books:
+            return None
+
+        last_book = scanned_books[-1]
+        decoder = Decoder.for_instance(data)
+        new_book = next(
+            (book for book in decoder.library_books(lib_id) if book not in solution.scanned_books),
+            None
+        )
+        if new_book is None or data.scores[new_book] <= data.scores[last_book]:
+            return None
+        return lib_id, last_book, new_book
+
+    @staticmethod
+    def swap_last_book(solution, data):
+        """See `Tweaks.tweak_solution_swap_last_book`."""
+        swap = Moves.last_book_swap(solution, data)
+        if swap is None:
+            return None
+
+        lib_id, last_book, new_book = swap
+        scanned_books = solution.scanned_books_per_library[lib_id]
+        decoder = Decoder.for_instance(data)
+        undo_log = UndoLog()
+        undo_log.push(setattr, solution, 'fitness_score', solution.fitness_score)
+        undo_log.push(setattr, solution, 'checkpoints', solution.checkpoints)
+        undo_log.push(setattr, solution, 'book_hash', solution.book_hash)
+        undo_log.push(solution.scanned_books_per_library.__setitem__, lib_id, scanned_books)
+        undo_log.push(solution.scanned_books.add, last_book)
+        undo_log.push(solution.scanned_books.remove, new_book)
+
+        solution.scanned_books_per_library[lib_id] = scanned_books[:-1] + [new_book]
+        solution.scanned_books.remove(last_book)
+        solution.scanned_books.add(new_book)
+        solution.calculate_delta_fitness(data, new_book, last_book)
+        solution.checkpoints = None
+        if solution.order_hash is not None:
+            solution.book_hash = decoder.fingerprint_keys.book_hash((last_book, new_book), solution.book_hash)
+        return undo_log
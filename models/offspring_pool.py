@@ -0,0 +1,87 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from models.compact_solution import CompactSolution
+from models.decoder import Decoder
+from models.shared_instance import SharedInstance
+from models.tweaks import Tweaks
+
+
+class OffspringPool:
+    """
+    Persistent worker processes that turn batches of parent pairs into offspring
+    (crossover, then `Tweaks.tweak_with_iterations` with probability `mutation_prob`).
+
+    Workers attach to the instance through `SharedInstance` once, when they start.
+    Parents and offspring travel as `CompactSolution`s. Every batch runs with its own
+    seed, so the offspring only depend on the seeds and not on which worker ran them.
+    Workers always pick tweaks by the static `Tweaks.WEIGHTS` and record no telemetry.
+    """
+    # Parent pairs per task
+    BATCH_SIZE = 4
+
+    # `GeneticSolver` of the worker process, see `init_worker`
+    _worker_solver = None
+
+    def __init__(self, instance, workers, mutation_prob, tweak_steps, batch_size=BATCH_SIZE):
+        self.num_books = instance.num_books
+        self.batch_size = batch_size
+        self.shared = SharedInstance.publish(instance)
+        self.executor = ProcessPoolExecutor(max_workers=workers,
+                                            initializer=OffspringPool.init_worker,
+                                            initargs=(self.shared.handle, mutation_prob, tweak_steps))
+
+    def create(self, parent_pairs):
+        """Offspring of every parent pair, two per pair, in the order of `parent_pairs`."""
+        compact = {}
+
+        def encode(solution):
+            if isinstance(solution, CompactSolution):
+                return solution
+            if id(solution) not in compact:
+                compact[id(solution)] = CompactSolution.from_solution(solution, self.num_books)
+            return compact[id(solution)]
+
+        batches = [
+            [(encode(parent1), encode(parent2)) for parent1, parent2 in parent_pairs[i:i + self.batch_size]]
+            for i in range(0, len(parent_pairs), self.batch_size)
+        ]
+        # Seeds are drawn here, so runs are reproducible for a given `random.seed`
+        seeds = [random.getrandbits(64) for _ in batches]
+
+        offspring = []
+        for batch_offspring in self.executor.map(OffspringPool.run_batch, batches, seeds):
+            offspring.extend(batch_offspring)
+        return offspring
+
+    def close(self):
+        self.executor.shutdown()
+        self.shared.unlink()
+
+    @staticmethod
+    def init_worker(instance_handle, mutation_prob, tweak_steps):
+        # Imported here, `GeneticSolver` creates the pool
+        from models.genetic_solver import GeneticSolver
+
+        # Workers start at the first batch and inherit the hooks the solver has set by
+        # then; with them, offspring would depend on the worker's own timings
+        Tweaks.scheduler = None
+        Tweaks.telemetry = None
+        Decoder.telemetry = None
+        Decoder.fitness_cache = None
+
+        instance = SharedInstance.attach(instance_handle)
+        OffspringPool._worker_solver = GeneticSolver(None, instance, mutation_prob=mutation_prob,
+                                                     tweak_steps=tweak_steps, fitness_cache_size=0)
+
+    @staticmethod
+    def run_batch(parent_pairs, seed):
+        random.seed(seed)
+        solver = OffspringPool._worker_solver
+        num_books = solver.instance.num_books
+
+        offspring = []
+        for parent1, parent2 in parent_pairs:
+            for solution in solver.create_offspring_pair(parent1, parent2):
+                offspring.append(CompactSolution.from_solution(solution, num_books))
+        return offspring
@@ -0,0 +1,134 @@
+import random
+
+
+class OperatorScheduler:
+    """
+    Picks tweak operators by how much fitness they recently gained per CPU-second
+    (probability matching). Every operator keeps at least `floor` probability, so
+    operators that stopped paying off are still tried now and then, and operators
+    with fewer than `warmup` applications are treated like the best one so far.
+
+    Gains and CPU times fade by `decay` per application of the operator, so the
+    weights follow the search as it moves from easy to hard improvements. The
+    probabilities are recomputed every `update_interval` records.
+
+    Usage:
+    scheduler = OperatorScheduler(Tweaks.get_tweak_methods_by_name(), Tweaks.WEIGHTS)
+    method = scheduler.choose()
+    scheduler.record(method, gain, cpu_seconds)
+    print(scheduler)                       # per-operator statistics
+    """
+    FLOOR = 0.02
+    DECAY = 0.99
+    WARMUP = 10
+    UPDATE_INTERVAL = 50
+
+    def __init__(self, operators, weights=None, floor=FLOOR, decay=DECAY, warmup=WARMUP,
+                 update_interval=UPDATE_INTERVAL):
+        self.names = list(operators)
+        self.methods = [operators[name] for name in self.names]
+        self.index = {method: i for i, method in enumerate(self.methods)}
+        self.floor = min(floor, 1.0 / len(self.methods))
+        self.decay = decay
+        self.warmup = warmup
+        self.update_interval = update_interval
+
+        weights = weights or {}
+        self.prior = [weights.get(name, 1.0) for name in self.names]
+        self.calls = [0] * len(self.methods)
+        self.improvements = [0] * len(self.methods)
+        self.gain = [0] * len(self.methods)
+        self.seconds = [0.0] * len(self.methods)
+        self.recent_gain = [0.0] * len(self.methods)
+        self.recent_seconds = [0.0] * len(self.methods)
+        self.pending = 0
+
+        self.probabilities = self.matched(self.prior)
+        self.cum_weights = OperatorScheduler.cumulative(self.probabilities)
+
+    @staticmethod
+    def cumulative(probabilities):
+        total = 0.0
+        cum_weights = []
+        for probability in probabilities:
+            total += probability
+            cum_weights.append(total)
+        return cum_weights
+
+    def matched(self, rates):
+        """Probabilities proportional to `rates`, each at least `floor`."""
+        total = sum(rates)
+        if total <= 0:
+            return [1.0 / len(rates)] * len(rates)
+        share = 1.0 - self.floor * len(rates)
+        return [self.floor + share * rate / total for rate in rates]
+
+    def choose(self):
+        return random.choices(self.methods, cum_weights=self.cum_weights, k=1)[0]
+
+    def record(self, method, gain, seconds):
+        """`gain` is the fitness change the operator left in the solution, `seconds` its CPU time."""
+        i = self.index[method]
+        gain = max(gain, 0)
+        self.calls[i] += 1
+        if gain > 0:
+            self.improvements[i] += 1
+        self.gain[i] += gain
+        self.seconds[i] += seconds
+        self.recent_gain[i] = self.decay * self.recent_gain[i] + gain
+        self.recent_seconds[i] = self.decay * self.recent_seconds[i] + seconds
+
+        self.pending += 1
+        if self.pending >= self.update_interval:
+            self.update()
+
+    def update(self):
+        self.pending = 0
+        rates = [gain / seconds if seconds > 0 else 0.0
+                 for gain, seconds in zip(self.recent_gain, self.recent_seconds)]
+        best_rate = max(rates)
+        rates = [best_rate if calls < self.warmup else rate for rate, calls in zip(rates, self.calls)]
+        # Nothing improved yet, keep the static weights
+        self.probabilities = self.matched(rates if best_rate > 0 else self.prior)
+        self.cum_weights = OperatorScheduler.cumulative(self.probabilities)
+
+    # Statistics that `state` saves, e.g. in a `SolverCheckpoint`
+    STATE = ('calls', 'improvements', 'gain', 'seconds', 'recent_gain', 'recent_seconds', 'probabilities')
+
+    def state(self):
+        """Picklable statistics by operator name, for `restore`."""
+        return {
+            'pending': self.pending,
+            'operators': {name: {field: getattr(self, field)[i] for field in OperatorScheduler.STATE}
+                          for i, name in enumerate(self.names)},
+        }
+
+    def restore(self, state):
+        """Continues from `state()` of an earlier scheduler; operators it does not know keep their prior."""
+        self.pending = state['pending']
+        for i, name in enumerate(self.names):
+            saved = state['operators'].get(name)
+            if saved is not None:
+                for field in OperatorScheduler.STATE:
+                    getattr(self, field)[i] = saved[field]
+        self.cum_weights = OperatorScheduler.cumulative(self.probabilities)
+
+    def stats(self):
+        return {
+            name: {
+                'calls': self.calls[i],
+                'improvements': self.improvements[i],
+                'gain': self.gain[i],
+                'cpu_sec': self.seconds[i],
+                'gain_per_sec': self.gain[i] / self.seconds[i] if self.seconds[i] > 0 else 0.0,
+                'probability': self.probabilities[i],
+            }
+            for i, name in enumerate(self.names)
+        }
+
+    def __str__(self):
+        return '\n'.join(
+            f"{name}: calls: {stats['calls']}, improvements: {stats['improvements']}, gain: {stats['gain']}, "
+            f"gain/s: {stats['gain_per_sec']:.0f}, probability: {stats['probability']:.1%}"
+            for name, stats in self.stats().items()
+        )
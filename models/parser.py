@@ -2,6 +2,8 @@ from .library import Library
 from .instance_data import InstanceData
 import sys
 
+import numpy as np
+
 class Parser:
     def __init__(self, file_path):
         self.file_path = file_path
@@ -37,6 +39,8 @@ class Parser:
                     except ValueError:
                         raise ValueError("Book scores must be integers")
 
+                    # Libraries get their position in the file as id, like in `parse_fast`
+                    Library._id_counter = 0
                     libs = []
                     for i in range(num_libs):
                         lib_header = file.readline().strip()
@@ -91,3 +95,135 @@ class Parser:
             sys.exit(1)
 
             # raise Exception(f"Unexpected error when parsing file: {str(e)}")
+
+
+    def parse_fast(self):
+        """
+        Bulk variant of `parse`. The whole file is read at once, the score line and all
+        book lines are tokenized into a NumPy integer buffer in a single call and then
+        sliced into library records. Validation rules and error handling are the same
+        as in `parse`; libraries get their position in the file as id.
+        """
+        try:
+            with open(self.file_path, 'rb') as file:
+                content = file.read()
+            try:
+                return self._parse_buffer(content)
+            except ValueError as e:
+                print(f"Error parsing file: {str(e)}")
+                sys.exit(1)
+        except FileNotFoundError:
+            print(f"File not found: {self.file_path}")
+            sys.exit(1)
+        except PermissionError:
+            print(f"Permission denied when accessing: {self.file_path}")
+            sys.exit(1)
+        except Exception as e:
+            print(f"Unexpected error when parsing file: {str(e)}")
+            sys.exit(1)
+
+    @staticmethod
+    def _tokenize(lines):
+        """
+        Tokenizes whitespace separated integers of the given (stripped) lines.
+        Returns the values as one int64 array (None if a token is not an integer)
+        and the number of tokens found on every line.
+        """
+        blob = b'\n'.join(lines)
+        chars = np.frombuffer(blob, dtype=np.uint8)
+        is_space = chars <= 32
+        token_starts = ~is_space
+        token_starts[1:] &= is_space[:-1]
+        line_of_char = np.cumsum(chars == 10)
+        counts = np.bincount(line_of_char[token_starts], minlength=len(lines))
+
+        try:
+            values = np.fromstring(blob.decode('ascii'), dtype=np.int64, sep=' ')
+        except ValueError:
+            return None, counts
+        if values.size != counts.sum():
+            return None, counts
+        return values, counts
+
+    def _parse_buffer(self, content):
+        lines = content.split(b'\n')
+
+        def line(index):
+            return lines[index].strip() if index < len(lines) else b''
+
+        first_line = line(0).decode('ascii', errors='replace')
+        if not first_line:
+            raise ValueError("File is empty or first line is missing")
+
+        try:
+            parts = first_line.split(' ')
+            if len(parts) != 3:
+                raise ValueError(f"First line should contain exactly 3 integers, got {len(parts)}")
+            num_books, num_libs, num_days = map(int, parts)
+            if num_books < 0 or num_libs < 0 or num_days < 0:
+                raise ValueError(f"All values must be non-negative: books={num_books}, libraries={num_libs}, days={num_days}")
+        except ValueError as e:
+            if "invalid literal for int" in str(e):
+                raise ValueError("First line should contain integers only")
+            raise
+
+        scores_line = line(1)
+        if not scores_line:
+            raise ValueError("Book scores line is missing")
+
+        scores, counts = self._tokenize([scores_line])
+        if scores is None or counts[0] != num_books:
+            raise ValueError("Book scores must be integers")
+
+        # Library headers are short, so they are checked one by one. The first structural
+        # error is remembered and only reported if no earlier library has invalid books.
+        headers = []
+        book_lines = []
+        pending_error = None
+        for i in range(num_libs):
+            lib_header = line(2 + 2 * i)
+            if not lib_header:
+                pending_error = f"Library {i} header is missing"
+                break
+
+            try:
+                parts = lib_header.split(b' ')
+                if len(parts) != 3:
+                    raise ValueError
+                header = tuple(map(int, parts))
+                if min(header) < 0:
+                    raise ValueError
+            except ValueError:
+                pending_error = f"Library {i} header must contain integers only"
+                break
+
+            books_line = line(3 + 2 * i)
+            if not books_line:
+                pending_error = f"Book list for library {i} is missing"
+                break
+
+            headers.append(header)
+            book_lines.append(books_line)
+
+        headers = np.array(headers, dtype=np.int64).reshape(-1, 3)
+        books, counts = self._tokenize(book_lines)
+
+        if books is None:
+            invalid = [i for i, books_line in enumerate(book_lines) if not all(t.lstrip(b'+-').isdigit() for t in books_line.split())]
+            raise ValueError(f"Book IDs for library {invalid[0]} must be integers")
+
+        lib_of_book = np.repeat(np.arange(len(book_lines)), counts)
+        invalid = (counts != headers[:, 0])
+        invalid[lib_of_book[(books < 0) | (books >= num_books)]] = True
+        if invalid.any():
+            raise ValueError(f"Book IDs for library {int(np.argmax(invalid))} must be integers")
+
+        if pending_error is not None:
+            raise ValueError(pending_error)
+
+        # Sort the books of every library by score (highest first, ties keep file order).
+        order = np.lexsort((-scores[books], lib_of_book))
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        return InstanceData.from_arrays(num_days, scores, headers[:, 0].copy(), headers[:, 1].copy(), headers[:, 2].copy(),
+                                        offsets, books[order].astype(np.int32))
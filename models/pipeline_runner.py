@@ -0,0 +1,204 @@
+import time
+
+from models.genetic_solver import GeneticSolver
+from models.initial_solution import InitialSolution
+from models.local_search import LocalSearch
+from models.tweaks import Tweaks
+
+
+class PipelineRunner:
+    """
+    Solves an instance within one wall-clock budget, in three stages:
+    - construct: the cheap constructors (sorted, greedy heap), then the weighted
+      efficiency grid and GRASP restarts while they keep finding better solutions
+    - ga: `GeneticSolver` from the best constructed solution
+    - polish: tweaks of the best solution until they stop improving it
+
+    Constructing gets `construct_share` of the budget, by default a share that grows
+    with the size of the instance (`CONSTRUCT_SHARES`), and polishing `polish_share`;
+    the GA gets the rest. Time a stage does not need moves on to the next one. The GA
+    does not start a generation that would run past its budget, and a GA that still
+    improved near the end of its time is resumed from its final state with half of the
+    remaining time, as long as that leaves time for the polish stage. Every stage
+    stops as soon as the best solution reaches the instance's upper bound.
+
+    After `run`, `stages` holds the budget, time spent and score gain of every stage.
+    """
+    # Share of the budget for constructing, by the number of library-book entries
+    CONSTRUCT_SHARES = [(10 ** 5, 0.05), (10 ** 6, 0.10), (None, 0.15)]
+    POLISH_SHARE = 0.10
+    CHEAP_CONSTRUCTORS = ('sorted', 'greedy')
+    # Construction stops after this many expensive constructors without improvement
+    STALL_CONSTRUCTORS = 4
+    # The GA is resumed if it improved within this share of its time before it stopped
+    IMPROVING_WINDOW = 0.2
+    # Polishing stops after this share of its budget without improvement
+    POLISH_STALL_SHARE = 0.25
+    MIN_STAGE_SEC = 1.0
+
+    def __init__(self, instance, time_budget_sec, construct_share=None, polish_share=POLISH_SHARE,
+                 grasp_p=0.03, **solver_params):
+        self.instance = instance
+        self.time_budget_sec = time_budget_sec
+        self.construct_share = construct_share if construct_share is not None else \
+            PipelineRunner.default_construct_share(instance)
+        self.polish_share = polish_share
+        self.grasp_p = grasp_p
+        # Passed on to `GeneticSolver`, except the time limit and the resume settings
+        self.solver_params = solver_params
+        self.upper_bound = None
+        self.genetic_solver = None
+        self.start_time = None
+        self.stages = []
+
+    @staticmethod
+    def default_construct_share(instance):
+        entries = len(instance.lib_book_ids)
+        for max_entries, share in PipelineRunner.CONSTRUCT_SHARES:
+            if max_entries is None or entries < max_entries:
+                return share
+
+    def run(self):
+        self.start_time = time.time()
+        self.upper_bound = self.instance.calculate_tight_upper_bound()
+        self.stages = []
+
+        best = self.construct(self.time_budget_sec * self.construct_share)
+        polish_budget = self.time_budget_sec * self.polish_share
+        best = self.genetic_algorithm(best, self.remaining() - polish_budget)
+        return self.polish(best, self.remaining())
+
+    def remaining(self):
+        return max(0.0, self.time_budget_sec - (time.time() - self.start_time))
+
+    def optimal(self, solution):
+        return solution.fitness_score >= self.upper_bound
+
+    def record(self, stage, budget, start, start_score, solution, **details):
+        self.stages.append({
+            'stage': stage,
+            'budget_sec': budget,
+            'seconds': time.time() - start,
+            'start_score': start_score,
+            'end_score': solution.fitness_score,
+            'gain': solution.fitness_score - (start_score or 0),
+            **details,
+        })
+
+    def constructors(self, deadline):
+        """(name, constructor) pairs, the cheap ones first, then GRASP restarts until `deadline`."""
+        data = self.instance
+        yield 'sorted', lambda: InitialSolution.generate_initial_solution_sorted(data)
+        yield 'greedy', lambda: InitialSolution.generate_initial_greedy_heap(data)
+        for alpha in InitialSolution.WEIGHTED_EFFICIENCY_ALPHAS:
+            for beta in InitialSolution.WEIGHTED_EFFICIENCY_BETAS:
+                yield f'weighted_efficiency({alpha}, {beta})', \
+                    lambda alpha=alpha, beta=beta: \
+                    InitialSolution.generate_initial_solution_weighted_efficiency(data, alpha=alpha, beta=beta)
+        while time.time() < deadline:
+            yield 'grasp', lambda: LocalSearch.local_search(
+                InitialSolution.build_grasp_solution(data, self.grasp_p), data,
+                time_limit=min(5.0, max(0.0, deadline - time.time())), max_iterations=100)
+
+    def construct(self, budget):
+        start = time.time()
+        best = None
+        best_name = None
+        built = 0
+        without_improvement = 0
+        # Expected seconds per kind of constructor, from its last run
+        estimates = {}
+
+        for name, constructor in self.constructors(start + budget):
+            kind = name.split('(')[0]
+            cheap = kind in PipelineRunner.CHEAP_CONSTRUCTORS
+            # The cheap constructors always run, the others only while they fit and pay off
+            if not cheap:
+                if without_improvement >= PipelineRunner.STALL_CONSTRUCTORS:
+                    break
+                if time.time() - start + estimates.get(kind, 0.0) > budget:
+                    # Only GRASP restarts follow a GRASP restart
+                    if kind == 'grasp':
+                        break
+                    continue
+
+            constructor_start = time.time()
+            solution = constructor()
+            estimates[kind] = time.time() - constructor_start
+            built += 1
+
+            if best is None or solution.fitness_score > best.fitness_score:
+                best, best_name = solution, name
+                without_improvement = 0
+            elif not cheap:
+                without_improvement += 1
+            if self.optimal(best):
+                break
+
+        self.record('construct', budget, start, None, best, constructors=built, best_constructor=best_name)
+        return best
+
+    def genetic_algorithm(self, best, budget):
+        start = time.time()
+        start_score = best.fitness_score
+        if self.optimal(best) or budget < PipelineRunner.MIN_STAGE_SEC:
+            self.record('ga', budget, start, start_score, best, generations=0, extensions=0)
+            return best
+
+        time_limit = budget
+        extensions = 0
+        final_state = None
+        while True:
+            # A resumed solver counts the time of the previous runs against its limit
+            self.genetic_solver = GeneticSolver(best, self.instance, time_limit_sec=time_limit,
+                                                resume_from=final_state, keep_final_state=True,
+                                                **self.solver_params)
+            solution = self.genetic_solver.solve(deadline=start + time_limit)
+            final_state = self.genetic_solver.final_state
+            if solution.fitness_score > best.fitness_score:
+                best = solution
+
+            extension = self.remaining() / 2
+            if not self.still_improving(time_limit) or extension < PipelineRunner.MIN_STAGE_SEC:
+                break
+            time_limit += extension
+            extensions += 1
+
+        # The budget including the extensions
+        self.record('ga', time_limit, start, start_score, best,
+                    generations=len(self.genetic_solver.diversity_history), extensions=extensions)
+        return best
+
+    def still_improving(self, time_limit):
+        """Whether the GA stopped on its time limit while it was still improving."""
+        solver = self.genetic_solver
+        if solver.gap is not None and solver.stop_gap is not None and solver.gap <= solver.stop_gap:
+            return False
+        if len(solver.diversity_history) >= solver.generations or not solver.best_history:
+            return False
+        last_improvement, _ = solver.best_history[-1]
+        return last_improvement >= time_limit * (1 - PipelineRunner.IMPROVING_WINDOW)
+
+    def polish(self, best, budget):
+        start = time.time()
+        start_score = best.fitness_score
+        stall_sec = max(PipelineRunner.MIN_STAGE_SEC, budget * PipelineRunner.POLISH_STALL_SHARE)
+        last_improvement = start
+        iterations = 0
+
+        while not self.optimal(best) and time.time() - start < budget and time.time() - last_improvement < stall_sec:
+            solution = Tweaks.tweak_with_iterations(best, self.instance, iterations=self.solver_params.get('tweak_steps', 5))
+            iterations += 1
+            if solution.fitness_score > best.fitness_score:
+                best = solution
+                last_improvement = time.time()
+
+        self.record('polish', budget, start, start_score, best, iterations=iterations)
+        return best
+
+    def report(self):
+        lines = [f'upper bound: {self.upper_bound}']
+        for stage in self.stages:
+            lines.append(f"{stage['stage']}: {stage['seconds']:.1f}s of {stage['budget_sec']:.1f}s, "
+                         f"score {stage['end_score']}, gain {stage['gain']}")
+        return '\n'.join(lines)
@@ -0,0 +1,112 @@
+import heapq
+from collections import Counter
+
+
+class Population:
+    """
+    Individuals ordered by fitness. A min-heap keeps the worst individual on top, so
+    inserting with eviction of the worst is O(log P), and `best` is kept up to date on
+    every insert, so best and worst queries are O(1).
+
+    With a `fingerprint` function the population also counts the fingerprints of its
+    individuals, for duplicate checks and `diversity`.
+    """
+
+    def __init__(self, individuals=(), capacity=None, fingerprint=None):
+        self.capacity = capacity
+        self.fingerprint = fingerprint
+        self.fingerprints = Counter()
+        # (fitness, insertion number, individual); the insertion number breaks ties
+        self._heap = []
+        self._counter = 0
+        self._best = None
+        self._ranked = None
+
+        for individual in individuals:
+            self._heap.append(self._entry(individual))
+        heapq.heapify(self._heap)
+        self._best = max(self._heap, default=None)
+        while self.capacity is not None and len(self._heap) > self.capacity:
+            self.pop_worst()
+
+    def _entry(self, individual):
+        self._counter += 1
+        if self.fingerprint is not None:
+            self.fingerprints[self.fingerprint(individual)] += 1
+        return individual.fitness_score, self._counter, individual
+
+    def _forget(self, entry):
+        if self.fingerprint is not None:
+            fingerprint = self.fingerprint(entry[2])
+            self.fingerprints[fingerprint] -= 1
+            if not self.fingerprints[fingerprint]:
+                del self.fingerprints[fingerprint]
+        if entry is self._best:
+            self._best = max(self._heap, default=None)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __iter__(self):
+        return (entry[2] for entry in self._heap)
+
+    @property
+    def best(self):
+        return self._best[2] if self._best is not None else None
+
+    @property
+    def worst(self):
+        return self._heap[0][2] if self._heap else None
+
+    def has_fingerprint(self, fingerprint):
+        return fingerprint in self.fingerprints
+
+    def diversity(self):
+        """Share of distinct fingerprints among the individuals."""
+        return len(self.fingerprints) / len(self._heap) if self._heap else 0.0
+
+    def add(self, individual):
+        """
+        Inserts `individual`. When the population is full the worst individual, which
+        may be `individual` itself, is evicted and returned.
+        """
+        self._ranked = None
+        entry = self._entry(individual)
+        if self._best is None or entry[0] > self._best[0]:
+            self._best = entry
+
+        if self.capacity is not None and len(self._heap) >= self.capacity:
+            evicted = heapq.heappushpop(self._heap, entry)
+            self._forget(evicted)
+            return evicted[2]
+        heapq.heappush(self._heap, entry)
+        return None
+
+    def pop_worst(self):
+        self._ranked = None
+        entry = heapq.heappop(self._heap)
+        self._forget(entry)
+        return entry[2]
+
+    def replace_worst(self, individuals):
+        """Evicts as many of the worst individuals as `individuals` holds, then adds them."""
+        for _ in range(min(len(individuals), len(self._heap))):
+            self.pop_worst()
+        for individual in individuals:
+            self.add(individual)
+
+    def ranked(self):
+        """Individuals from best to worst. Cached until the population changes."""
+        if self._ranked is None:
+            # Ties in insertion order, so a population rebuilt from this list ranks the same
+            self._ranked = [entry[2] for entry in sorted(self._heap, key=lambda entry: (-entry[0], entry[1]))]
+        return self._ranked
+
+    def copy(self):
+        population = Population(capacity=self.capacity, fingerprint=self.fingerprint)
+        population.fingerprints = self.fingerprints.copy()
+        population._heap = self._heap.copy()
+        population._counter = self._counter
+        population._best = self._best
+        population._ranked = self._ranked
+        return population
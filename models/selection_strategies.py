@@ -1,4 +1,6 @@
 import random
+from bisect import bisect_right
+from itertools import accumulate
 
 
 class SelectionStrategies:
@@ -54,3 +56,56 @@ class SelectionStrategies:
             if current > pick:
                 return ind
         return sorted_pop[-1]  # fallback
+
+
+class SelectionTables:
+    """
+    `SelectionStrategies` for one generation. The cumulative fitness of `population`
+    (roulette), its fitness ranks (rank) and the cumulative method weights are built
+    once, after which every selection is a bisect instead of a pass over the
+    population. For the same random state the selected individuals are the same as
+    with the `SelectionStrategies` methods.
+
+    Usage:
+    tables = SelectionTables(population)
+    selection_method = tables.choose_selection_method()
+    parent1 = selection_method()
+    """
+
+    def __init__(self, population):
+        self.population = population
+
+        self.cumulative_fitness = list(accumulate(ind.fitness_score for ind in population))
+        self.total_fitness = self.cumulative_fitness[-1] if population else 0
+
+        self.sorted_population = sorted(population, key=lambda ind: ind.fitness_score)
+        self.cumulative_ranks = list(accumulate(range(1, len(population) + 1)))
+        self.total_rank = self.cumulative_ranks[-1] if population else 0
+
+        methods = {
+            SelectionStrategies.tournament_selection: self.tournament_selection,
+            SelectionStrategies.roulette_wheel_selection: self.roulette_wheel_selection,
+            SelectionStrategies.rank_selection: self.rank_selection,
+        }
+        strategies, weights = zip(*SelectionStrategies.get_selection_methods())
+        self.methods = [methods[strategy] for strategy in strategies]
+        self.cumulative_weights = list(accumulate(weights))
+
+    def choose_selection_method(self):
+        return random.choices(self.methods, cum_weights=self.cumulative_weights, k=1)[0]
+
+    def tournament_selection(self, k=10):
+        tournament = random.sample(self.population, k)
+        return max(tournament, key=lambda ind: ind.fitness_score)
+
+    def roulette_wheel_selection(self):
+        if self.total_fitness == 0:
+            return random.choice(self.population)
+        pick = random.uniform(0, self.total_fitness)
+        index = bisect_right(self.cumulative_fitness, pick)
+        return self.population[index] if index < len(self.population) else self.population[-1]
+
+    def rank_selection(self):
+        pick = random.uniform(0, self.total_rank)
+        index = bisect_right(self.cumulative_ranks, pick)
+        return self.sorted_population[index] if index < len(self.population) else self.sorted_population[-1]
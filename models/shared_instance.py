@@ -0,0 +1,89 @@
+import gc
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .decoder import Decoder
+from .instance_data import InstanceData
+
+
+class SharedInstance:
+    """
+    Publishes the array layout of an `InstanceData` in one shared memory block so that
+    worker processes can attach to it without parsing or copying the instance.
+
+    Usage:
+    shared = SharedInstance.publish(instance)
+    executor.submit(worker, shared.handle)        # the handle is small and picklable
+    # in the worker
+    instance = SharedInstance.attach(handle)      # zero-copy, read-only arrays
+    SharedInstance.detach(handle)                 # when the worker is done with it
+    # in the owner, once every worker is done
+    shared.unlink()
+    """
+    ALIGNMENT = 64
+
+    # Instances this process has attached to, by shared memory name
+    _attached = {}
+
+    def __init__(self, shm, handle):
+        self.shm = shm
+        self.handle = handle
+
+    @classmethod
+    def publish(cls, instance):
+        layout = []
+        size = 0
+        for name in InstanceData.ARRAYS:
+            array = getattr(instance, name)
+            size = -(-size // cls.ALIGNMENT) * cls.ALIGNMENT
+            layout.append((name, array.dtype.str, array.shape, size))
+            size += array.nbytes
+
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for (name, dtype, shape, offset), array in zip(layout, (getattr(instance, n) for n in InstanceData.ARRAYS)):
+            np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)[...] = array
+
+        return cls(shm, (shm.name, instance.num_days, tuple(layout)))
+
+    @classmethod
+    def attach(cls, handle):
+        name, num_days, layout = handle
+        if name in cls._attached:
+            return cls._attached[name]
+
+        shm = shared_memory.SharedMemory(name=name)
+        arrays = []
+        for _, dtype, shape, offset in layout:
+            array = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            array.flags.writeable = False
+            arrays.append(array)
+
+        instance = InstanceData.from_arrays(num_days, *arrays)
+        # The arrays are views on the block, keep it mapped as long as the instance lives
+        instance.shared_memory = shm
+        cls._attached[name] = instance
+        return instance
+
+    @classmethod
+    def detach(cls, handle):
+        """
+        Forgets the instance `attach` returned for `handle` in this process, with its
+        decoder and the objects built on it, and unmaps the block. Nothing may still
+        use that instance.
+        """
+        instance = cls._attached.pop(handle[0], None)
+        if instance is None:
+            return
+        shm = instance.shared_memory
+        Decoder.release(instance)
+        del instance
+        # `LibraryView` and the instance reference each other, so their views on the
+        # block are only freed by the cycle collector
+        gc.collect()
+        shm.close()
+
+    def unlink(self):
+        """Releases the block. Only the process that published it should call this."""
+        self.shm.close()
+        self.shm.unlink()
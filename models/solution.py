@@ -7,6 +7,15 @@ class Solution:
     scanned_books_per_library = {}
     scanned_books = set()
     fitness_score = -1
+    # Set by `Decoder` for solutions it built, see `DecodeCheckpoints`
+    checkpoints = None
+    # Fingerprint parts, see `FingerprintKeys`; None until a decoder computed them
+    order_hash = None
+    book_hash = 0
+    # Copy-on-write flags: the containers (`shared`) or only the checkpoints
+    # (`shares_checkpoints`) may be referenced by another solution
+    shared = False
+    shares_checkpoints = False
 
     def __init__(self, signed_libs, unsigned_libs, scanned_books_per_library, scanned_books):
         self.signed_libraries = signed_libs
@@ -72,4 +81,37 @@ class Solution:
 
         copy = Solution(signed_libraries, unsigned_libraries, scanned_books_per_library, scanned_books)
         copy.fitness_score = fitness_score
-        return copy
\ No newline at end of file
+        copy.checkpoints = self.checkpoints
+        copy.order_hash = self.order_hash
+        copy.book_hash = self.book_hash
+        if self.checkpoints is not None:
+            self.shares_checkpoints = copy.shares_checkpoints = True
+        return copy
+
+    def clone(self):
+        """
+        Copy-on-write copy: the clone shares every container with this solution until
+        one of them calls `make_writable`.
+        """
+        clone = Solution(self.signed_libraries, self.unsigned_libraries,
+                         self.scanned_books_per_library, self.scanned_books)
+        clone.fitness_score = self.fitness_score
+        clone.checkpoints = self.checkpoints
+        clone.order_hash = self.order_hash
+        clone.book_hash = self.book_hash
+        self.shared = clone.shared = True
+        return clone
+
+    def make_writable(self):
+        """Gives this solution its own containers before it is modified in place."""
+        if self.shared:
+            self.signed_libraries = self.signed_libraries.copy()
+            self.unsigned_libraries = self.unsigned_libraries.copy()
+            self.scanned_books_per_library = self.scanned_books_per_library.copy()
+            self.scanned_books = self.scanned_books.copy()
+            self.shared = False
+            self.shares_checkpoints = True
+        if self.shares_checkpoints:
+            if self.checkpoints is not None:
+                self.checkpoints = self.checkpoints.copy()
+            self.shares_checkpoints = False
\ No newline at end of file
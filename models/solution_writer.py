@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+
+from models.solution import Solution
+
+
+class SolutionWriter:
+    """
+    Writes best-so-far solutions from a background thread while the GA keeps running.
+
+    `submit` only hands the solution over; the thread exports it atomically (temporary
+    file + `os.replace`) to `output_path`, at most every `interval_sec` seconds unless
+    the score improved by at least `min_improvement` since the last write. Solutions
+    submitted while a write is pending replace the pending one. Every submission is
+    also appended to the trace file as `elapsed_sec,score`; with `append` an existing
+    trace is continued instead of started over. `close` writes the last submitted
+    solution and stops the thread.
+    """
+
+    def __init__(self, output_path=None, trace_path=None, interval_sec=5.0, min_improvement=None, append=False):
+        self.output_path = output_path
+        self.trace_path = trace_path
+        self.interval_sec = interval_sec
+        self.min_improvement = min_improvement
+
+        self._condition = threading.Condition()
+        self._pending = None
+        self._trace = []
+        self._closed = False
+        self._last_write = float('-inf')
+        self._last_score = None
+
+        if trace_path is not None and not (append and os.path.exists(trace_path)):
+            SolutionWriter._make_parent(trace_path)
+            with open(trace_path, 'w') as file:
+                file.write('elapsed_sec,score\n')
+
+        self._thread = threading.Thread(target=self._run, name='solution-writer', daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _make_parent(file_path):
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def submit(self, solution, elapsed):
+        # A copy-on-write clone, in case the GA modifies the solution after handing it over
+        if isinstance(solution, Solution):
+            solution = solution.clone()
+        with self._condition:
+            self._pending = solution
+            self._trace.append((elapsed, solution.fitness_score))
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _due(self, solution):
+        if self._last_score is None:
+            return True
+        if self.min_improvement is not None and solution.fitness_score - self._last_score >= self.min_improvement:
+            return True
+        return time.monotonic() - self._last_write >= self.interval_sec
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and not self._trace and \
+                        (self._pending is None or not self._due(self._pending)):
+                    # Wake up again when a throttled solution becomes due
+                    timeout = None if self._pending is None else \
+                        max(0.0, self._last_write + self.interval_sec - time.monotonic())
+                    self._condition.wait(timeout)
+
+                closed = self._closed
+                trace, self._trace = self._trace, []
+                solution = self._pending
+                if solution is not None and (closed or self._due(solution)):
+                    self._pending = None
+                else:
+                    solution = None
+
+            if trace and self.trace_path is not None:
+                with open(self.trace_path, 'a') as file:
+                    file.writelines(f'{elapsed:.3f},{score}\n' for elapsed, score in trace)
+            if solution is not None and self.output_path is not None:
+                self._write(solution)
+            if closed:
+                return
+
+    def _write(self, solution):
+        SolutionWriter._make_parent(self.output_path)
+        tmp_path = f'{self.output_path}.{os.getpid()}.tmp'
+        solution.export(tmp_path)
+        os.replace(tmp_path, self.output_path)
+        self._last_write = time.monotonic()
+        self._last_score = solution.fitness_score
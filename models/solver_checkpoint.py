@@ -0,0 +1,77 @@
+import os
+import pickle
+
+from models.compact_solution import CompactSolution
+
+
+class SolverCheckpoint:
+    """
+    On-disk snapshot of a `GeneticSolver` run: the population as `CompactSolution`s,
+    the generation counter, the adaptive state, the elapsed time and the `random`
+    state. Snapshots are written atomically (temporary file + `os.replace`), so a
+    killed run leaves either the previous snapshot or the new one.
+
+    A snapshot is only loaded for the instance and the solver configuration it was
+    written for; missing, unreadable or foreign snapshots are ignored and the run
+    starts from scratch.
+    """
+    FORMAT_VERSION = 2
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+    @staticmethod
+    def instance_key(instance):
+        return instance.num_books, instance.num_libs, instance.num_days, int(instance.score_array.sum())
+
+    @staticmethod
+    def run_key(instance, config):
+        """Identifies the run a snapshot belongs to: the instance and the solver's `checkpoint_config`."""
+        return SolverCheckpoint.instance_key(instance), tuple(sorted(config.items()))
+
+    def save(self, instance, config, population, state):
+        """`population` is an iterable of solutions, `state` a dict of picklable values."""
+        snapshot = {
+            'format_version': SolverCheckpoint.FORMAT_VERSION,
+            'run': SolverCheckpoint.run_key(instance, config),
+            'population': [
+                solution if isinstance(solution, CompactSolution)
+                else CompactSolution.from_solution(solution, instance.num_books)
+                for solution in population
+            ],
+            'state': state,
+        }
+
+        directory = os.path.dirname(self.file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{self.file_path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as file:
+                pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.file_path)
+        except OSError:
+            # A failed snapshot only costs us the ability to resume from it
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def load(self, instance, config):
+        """Returns `(population, state)`, or None if there is no usable snapshot."""
+        try:
+            with open(self.file_path, 'rb') as file:
+                snapshot = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None
+
+        if not isinstance(snapshot, dict) or snapshot.get('format_version') != SolverCheckpoint.FORMAT_VERSION:
+            return None
+        if snapshot.get('run') != SolverCheckpoint.run_key(instance, config):
+            return None
+        return snapshot['population'], snapshot['state']
+
+    def remove(self):
+        """Deletes the snapshot, e.g. once the run it belongs to finished."""
+        try:
+            os.remove(self.file_path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,110 @@
+import json
+import os
+import time
+from collections import Counter
+
+
+class Timer:
+    """Adds the time spent in a `with` block to a `GenerationTelemetry` section."""
+    __slots__ = ('telemetry', 'section', 'start')
+
+    def __init__(self, telemetry, section):
+        self.telemetry = telemetry
+        self.section = section
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.telemetry.seconds[self.section] += time.perf_counter() - self.start
+
+
+class NoTimer:
+    """Stand-in for `Timer` when telemetry is disabled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+
+NO_TIMER = NoTimer()
+
+
+class GenerationTelemetry:
+    """
+    Per-generation counters of a `GeneticSolver` run, written as one JSON line per
+    generation to `file_path`:
+    - `seconds`: wall time per section (selection, crossover, tweaks, offspring_pool,
+      immigrants, migration) and in `Decoder` scans (decoding, which overlaps the others)
+    - `counts`: offspring created, immigrants injected, duplicates rejected, ...
+    - `tweaks`: applications, accepted and improving applications, acceptance rate
+      per tweak method
+    - best, mean and worst fitness and the diversity of the population
+
+    The solver only calls into this class when telemetry is enabled; otherwise it
+    times its sections with `NO_TIMER` and the hooks in `Decoder` and `Tweaks` stay
+    None, so a disabled run does no extra work.
+    """
+    SECTIONS = ('selection', 'crossover', 'tweaks', 'offspring_pool', 'immigrants', 'migration', 'decoding')
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(file_path, 'w')
+        self.timers = {section: Timer(self, section) for section in GenerationTelemetry.SECTIONS}
+        self.reset()
+
+    def reset(self):
+        self.seconds = dict.fromkeys(GenerationTelemetry.SECTIONS, 0.0)
+        self.counts = Counter()
+        # Tweak method name -> [applied, accepted, improved]
+        self.tweaks = {}
+
+    def timer(self, section):
+        return self.timers[section]
+
+    def add_time(self, section, seconds):
+        self.seconds[section] += seconds
+
+    def count(self, name, amount=1):
+        self.counts[name] += amount
+
+    def record_tweak(self, name, accepted, improved):
+        stats = self.tweaks.get(name)
+        if stats is None:
+            stats = self.tweaks[name] = [0, 0, 0]
+        stats[0] += 1
+        stats[1] += accepted
+        stats[2] += improved
+
+    def end_generation(self, generation, elapsed, population, **fields):
+        """Writes the counters of `generation` and starts counting the next one."""
+        scores = [individual.fitness_score for individual in population]
+        record = {
+            'generation': generation,
+            'elapsed_sec': round(elapsed, 6),
+            **fields,
+            'best': max(scores, default=None),
+            'mean': sum(scores) / len(scores) if scores else None,
+            'worst': min(scores, default=None),
+            'diversity': population.diversity(),
+            'seconds': {section: round(seconds, 6) for section, seconds in self.seconds.items()},
+            'counts': dict(self.counts),
+            'tweaks': {
+                name: {'applied': applied, 'accepted': accepted, 'improved': improved,
+                       'acceptance_rate': accepted / applied}
+                for name, (applied, accepted, improved) in self.tweaks.items()
+            },
+        }
+        self.file.write(json.dumps(record) + '\n')
+        self.reset()
+
+    def close(self):
+        self.file.close()
@@ -1,4 +1,8 @@
 import random
+import time
+
+from models.decoder import Decoder
+from models.moves import Moves
 from models.solution import Solution
 
 
@@ -13,6 +17,12 @@ class Tweaks:
         'insert_library': 2.0,
         'crossover': 1.0
     }
+    # `OperatorScheduler` that picks the tweaks of `tweak_with_iterations` instead of
+    # the static weights, see `GeneticSolver(adaptive_tweaks=True)`
+    scheduler = None
+    # `GenerationTelemetry` that counts applied and accepted tweaks, see
+    # `GeneticSolver(telemetry_path=...)`
+    telemetry = None
 
     @staticmethod
     def get_tweak_methods():
@@ -27,6 +37,19 @@ class Tweaks:
             (Tweaks.tweak_solution_swap_last_book, Tweaks.WEIGHTS['swap_last_book'])
         ]
 
+    @staticmethod
+    def get_tweak_methods_by_name():
+        """Return tweak methods by their name in `WEIGHTS`"""
+        return {
+            'swap_signed': Tweaks.tweak_solution_swap_signed,
+            'swap_signed_with_unsigned': Tweaks.tweak_solution_swap_signed_with_unsigned,
+            'swap_same_books': Tweaks.tweak_solution_swap_same_books,
+            'swap_last_book': Tweaks.tweak_solution_swap_last_book,
+            'swap_neighbor_libraries': Tweaks.tweak_solution_swap_neighbor_libraries,
+            'insert_library': Tweaks.tweak_solution_insert_library,
+            'crossover': Tweaks.tweak_solution_crossover
+        }
+
     @staticmethod
     def choose_tweak_method():
         """Randomly choose a tweak method based on weights"""
@@ -35,13 +58,43 @@ class Tweaks:
 
     @staticmethod
     def tweak_with_iterations(solution, data, iterations=10) -> Solution:
-        for i in range(iterations - 1):
-            tweak_method = Tweaks.choose_tweak_method()
-            solution_copy = solution.shallow_copy()
-            new_solution = tweak_method(solution_copy, data)
+        """
+        Applies `iterations - 1` random tweaks, keeping each one that does not lower the
+        fitness. Tweaks with a `Moves` counterpart are applied in place on a
+        copy-on-write clone and rolled back when rejected, so the input solution is
+        never modified and its containers are copied at most once.
+        """
+        moves = Moves.get_moves()
+        scheduler = Tweaks.scheduler
+        telemetry = Tweaks.telemetry
+        if telemetry is not None:
+            names = {method: name for name, method in Tweaks.get_tweak_methods_by_name().items()}
+        solution = solution.clone()
 
-            if new_solution.fitness_score >= solution.fitness_score:
-                solution = new_solution
+        for i in range(iterations - 1):
+            tweak_method = Tweaks.choose_tweak_method() if scheduler is None else scheduler.choose()
+            move = moves.get(tweak_method)
+            fitness_score = solution.fitness_score
+            if scheduler is not None:
+                start = time.thread_time()
+
+            if move is None:
+                new_solution = tweak_method(solution, data)
+                accepted = new_solution.fitness_score >= solution.fitness_score
+                if accepted:
+                    solution = new_solution
+            else:
+                solution.make_writable()
+                undo_log = move(solution, data)
+                accepted = undo_log is not None
+                if accepted and solution.fitness_score < fitness_score:
+                    undo_log.rollback()
+                    accepted = False
+
+            if scheduler is not None:
+                scheduler.record(tweak_method, solution.fitness_score - fitness_score, time.thread_time() - start)
+            if telemetry is not None:
+                telemetry.record_tweak(names[tweak_method], accepted, solution.fitness_score > fitness_score)
 
         return solution
 
@@ -62,70 +115,24 @@ class Tweaks:
         if len(solution.signed_libraries) < 2:
             return solution
 
-        # Create a copy of the solution
-        new_solution = Solution(
-            solution.signed_libraries.copy(),
-            solution.unsigned_libraries.copy(),
-            solution.scanned_books_per_library.copy(),
-            solution.scanned_books.copy()
-        )
+        signed_libraries = solution.signed_libraries.copy()
 
         # Select two random libraries to swap
-        idx1, idx2 = random.sample(range(len(new_solution.signed_libraries)), 2)
-        new_solution.signed_libraries[idx1], new_solution.signed_libraries[idx2] = \
-            new_solution.signed_libraries[idx2], new_solution.signed_libraries[idx1]
-
-        # Rebuild the solution
-        curr_time = 0
-        new_scanned_books = set()
-        new_scanned_books_per_library = {}
-        new_signed_libraries = []
-
-        for lib_id in new_solution.signed_libraries:
-            library = data.libs[lib_id]
-
-            # Check if there's enough time for signup and at least one day of scanning
-            if curr_time + library.signup_days >= data.num_days - 1:
-                new_solution.unsigned_libraries.append(lib_id)
-                continue
-
-            time_left = data.num_days - (curr_time + library.signup_days)
-            max_books_scanned = time_left * library.books_per_day
-
-            available_books = sorted(
-                {book.id for book in library.books} - new_scanned_books,
-                key=lambda b: -data.scores[b]
-            )[:max_books_scanned]
-
-            if available_books:
-                new_signed_libraries.append(lib_id)
-                new_scanned_books_per_library[lib_id] = available_books
-                new_scanned_books.update(available_books)
-                curr_time += library.signup_days
-            else:
-                new_solution.unsigned_libraries.append(lib_id)
+        idx1, idx2 = random.sample(range(len(signed_libraries)), 2)
+        signed_libraries[idx1], signed_libraries[idx2] = signed_libraries[idx2], signed_libraries[idx1]
 
-        new_solution.signed_libraries = new_signed_libraries
-        new_solution.scanned_books_per_library = new_scanned_books_per_library
-        new_solution.scanned_books = new_scanned_books
-        new_solution.calculate_fitness_score(data.scores)
-
-        return new_solution
+        return Decoder.for_instance(data).decode_from(solution, signed_libraries, min(idx1, idx2),
+                                                      solution.unsigned_libraries)
 
     @staticmethod
     def tweak_solution_swap_signed_with_unsigned(solution, data, bias_type=None, bias_ratio=2 / 3):
         if not solution.signed_libraries or not solution.unsigned_libraries:
             return solution
 
-        # Create a copy of the solution
-        new_solution = Solution(
-            solution.signed_libraries.copy(),
-            solution.unsigned_libraries.copy(),
-            solution.scanned_books_per_library.copy(),
-            solution.scanned_books.copy()
-        )
+        signed_libraries = solution.signed_libraries.copy()
+        unsigned_libraries = solution.unsigned_libraries.copy()
 
-        total_signed = len(new_solution.signed_libraries)
+        total_signed = len(signed_libraries)
 
         # Select signed library based on bias
         if bias_type == "favor_first_half":
@@ -142,177 +149,58 @@ class Tweaks:
             signed_idx = random.randint(0, total_signed - 1)
 
         # Select unsigned library
-        unsigned_idx = random.randint(0, len(new_solution.unsigned_libraries) - 1)
+        unsigned_idx = random.randint(0, len(unsigned_libraries) - 1)
 
         # Swap libraries
-        signed_lib_id = new_solution.signed_libraries[signed_idx]
-        unsigned_lib_id = new_solution.unsigned_libraries[unsigned_idx]
-        new_solution.signed_libraries[signed_idx] = unsigned_lib_id
-        new_solution.unsigned_libraries[unsigned_idx] = signed_lib_id
-
-        # Rebuild the solution
-        curr_time = 0
-        new_scanned_books = set()
-        new_scanned_books_per_library = {}
-        new_signed_libraries = []
-
-        for lib_id in new_solution.signed_libraries:
-            library = data.libs[lib_id]
-
-            # Check if there's enough time for signup and at least one day of scanning
-            if curr_time + library.signup_days >= data.num_days - 1:
-                new_solution.unsigned_libraries.append(lib_id)
-                continue
-
-            time_left = data.num_days - (curr_time + library.signup_days)
-            max_books_scanned = time_left * library.books_per_day
-
-            available_books = sorted(
-                {book.id for book in library.books} - new_scanned_books,
-                key=lambda b: -data.scores[b]
-            )[:max_books_scanned]
-
-            if available_books:
-                new_signed_libraries.append(lib_id)
-                new_scanned_books_per_library[lib_id] = available_books
-                new_scanned_books.update(available_books)
-                curr_time += library.signup_days
-            else:
-                new_solution.unsigned_libraries.append(lib_id)
+        signed_libraries[signed_idx], unsigned_libraries[unsigned_idx] = \
+            unsigned_libraries[unsigned_idx], signed_libraries[signed_idx]
 
-        new_solution.signed_libraries = new_signed_libraries
-        new_solution.scanned_books_per_library = new_scanned_books_per_library
-        new_solution.scanned_books = new_scanned_books
-        new_solution.calculate_fitness_score(data.scores)
-
-        return new_solution
+        return Decoder.for_instance(data).decode_from(solution, signed_libraries, signed_idx, unsigned_libraries)
 
     @staticmethod
     def tweak_solution_swap_same_books(solution, data):
         if len(solution.signed_libraries) < 2:
             return solution
 
-        # Create a copy of the solution
-        new_solution = Solution(
-            solution.signed_libraries.copy(),
-            solution.unsigned_libraries.copy(),
-            solution.scanned_books_per_library.copy(),
-            solution.scanned_books.copy()
-        )
+        signed_libraries = solution.signed_libraries.copy()
 
         # Select two random libraries to swap
-        idx1 = random.randint(0, len(new_solution.signed_libraries) - 1)
-        idx2 = random.randint(0, len(new_solution.signed_libraries) - 1)
+        idx1 = random.randint(0, len(signed_libraries) - 1)
+        idx2 = random.randint(0, len(signed_libraries) - 1)
         while idx1 == idx2:
-            idx2 = random.randint(0, len(new_solution.signed_libraries) - 1)
+            idx2 = random.randint(0, len(signed_libraries) - 1)
 
         # Swap the libraries
-        new_solution.signed_libraries[idx1], new_solution.signed_libraries[idx2] = \
-            new_solution.signed_libraries[idx2], new_solution.signed_libraries[idx1]
-
-        # Rebuild the solution
-        curr_time = 0
-        new_scanned_books = set()
-        new_scanned_books_per_library = {}
-        new_signed_libraries = []
-
-        for lib_id in new_solution.signed_libraries:
-            library = data.libs[lib_id]
-
-            # Check if there's enough time for signup and at least one day of scanning
-            if curr_time + library.signup_days >= data.num_days - 1:
-                new_solution.unsigned_libraries.append(lib_id)
-                continue
-
-            time_left = data.num_days - (curr_time + library.signup_days)
-            max_books_scanned = time_left * library.books_per_day
-
-            available_books = sorted(
-                {book.id for book in library.books} - new_scanned_books,
-                key=lambda b: -data.scores[b]
-            )[:max_books_scanned]
-
-            if available_books:
-                new_signed_libraries.append(lib_id)
-                new_scanned_books_per_library[lib_id] = available_books
-                new_scanned_books.update(available_books)
-                curr_time += library.signup_days
-            else:
-                new_solution.unsigned_libraries.append(lib_id)
+        signed_libraries[idx1], signed_libraries[idx2] = signed_libraries[idx2], signed_libraries[idx1]
 
-        new_solution.signed_libraries = new_signed_libraries
-        new_solution.scanned_books_per_library = new_scanned_books_per_library
-        new_solution.scanned_books = new_scanned_books
-        new_solution.calculate_fitness_score(data.scores)
-
-        return new_solution
+        return Decoder.for_instance(data).decode_from(solution, signed_libraries, min(idx1, idx2),
+                                                      solution.unsigned_libraries)
 
     @staticmethod
     def tweak_solution_swap_last_book(solution, data):
-        if not solution.signed_libraries:
+        """
+        Replaces the last (lowest scoring) book scanned by a random signed library with
+        the best book of that library that is not scanned anywhere yet, if that book
+        scores strictly higher, see `Moves.last_book_swap`. The number of books per
+        library does not change, so the solution stays feasible and only the fitness
+        delta has to be applied.
+        """
+        swap = Moves.last_book_swap(solution, data)
+        if swap is None:
             return solution
 
-        new_solution = Solution(
-            solution.signed_libraries.copy(),
-            solution.unsigned_libraries.copy(),
-            solution.scanned_books_per_library.copy(),
-            solution.scanned_books.copy()
-        )
-
-        lib_id = random.choice(new_solution.signed_libraries)
-        library = data.libs[lib_id]
-        scanned_books = new_solution.scanned_books_per_library.get(lib_id, [])
-
-        if not scanned_books:
-            return new_solution
-
-        last_book = scanned_books[-1]
-        available_books = sorted(
-            {book.id for book in library.books} - new_solution.scanned_books,
-            key=lambda b: -data.scores[b]
-        )
-
-        if not available_books:
-            return new_solution
-
-        new_book = available_books[0]
-        new_scanned_books = scanned_books[:-1] + [new_book]
-        new_solution.scanned_books_per_library[lib_id] = new_scanned_books
+        lib_id, last_book, new_book = swap
+        scanned_books = solution.scanned_books_per_library[lib_id]
+        decoder = Decoder.for_instance(data)
+        new_solution = solution.shallow_copy()
+        new_solution.scanned_books_per_library[lib_id] = scanned_books[:-1] + [new_book]
         new_solution.scanned_books.remove(last_book)
         new_solution.scanned_books.add(new_book)
-
-        curr_time = 0
-        new_scanned_books = set()
-        new_scanned_books_per_library = {}
-        new_signed_libraries = []
-
-        for lib_id in new_solution.signed_libraries:
-            library = data.libs[lib_id]
-
-            if curr_time + library.signup_days >= data.num_days - 1:
-                new_solution.unsigned_libraries.append(lib_id)
-                continue
-
-            time_left = data.num_days - (curr_time + library.signup_days)
-            max_books_scanned = time_left * library.books_per_day
-
-            available_books = sorted(
-                {book.id for book in library.books} - new_scanned_books,
-                key=lambda b: -data.scores[b]
-            )[:max_books_scanned]
-
-            if available_books:
-                new_signed_libraries.append(lib_id)
-                new_scanned_books_per_library[lib_id] = available_books
-                new_scanned_books.update(available_books)
-                curr_time += library.signup_days
-            else:
-                new_solution.unsigned_libraries.append(lib_id)
-
-        new_solution.signed_libraries = new_signed_libraries
-        new_solution.scanned_books_per_library = new_scanned_books_per_library
-        new_solution.scanned_books = new_scanned_books
-        new_solution.calculate_fitness_score(data.scores)
+        new_solution.calculate_delta_fitness(data, new_book, last_book)
+        if new_solution.order_hash is not None:
+            new_solution.book_hash = decoder.fingerprint_keys.book_hash((last_book, new_book), new_solution.book_hash)
+        # The books no longer match what the decoder would pick, so resuming is not possible
+        new_solution.checkpoints = None
 
         return new_solution
 
@@ -330,92 +218,19 @@ class Tweaks:
         # Select a random crossover point
         crossover_point = random.randint(1, len(solution.signed_libraries) - 1)
 
-        # Create two new solutions
-        solution1 = Solution(
+        # Create and rebuild two new solutions
+        decoder = Decoder.for_instance(data)
+        solution1 = decoder.decode_from(
+            solution,
             solution.signed_libraries[:crossover_point],
-            solution.unsigned_libraries + solution.signed_libraries[crossover_point:],
-            {},
-            set()
+            crossover_point,
+            solution.unsigned_libraries + solution.signed_libraries[crossover_point:]
         )
-
-        solution2 = Solution(
+        solution2 = decoder.decode(
             solution.signed_libraries[crossover_point:],
-            solution.unsigned_libraries + solution.signed_libraries[:crossover_point],
-            {},
-            set()
+            solution.unsigned_libraries + solution.signed_libraries[:crossover_point]
         )
 
-        # Rebuild both solutions
-        curr_time = 0
-        new_scanned_books = set()
-        new_scanned_books_per_library = {}
-        new_signed_libraries = []
-
-        # Process solution1
-        for lib_id in solution1.signed_libraries:
-            library = data.libs[lib_id]
-
-            # Check if there's enough time for signup and at least one day of scanning
-            if curr_time + library.signup_days >= data.num_days - 1:
-                solution1.unsigned_libraries.append(lib_id)
-                continue
-
-            time_left = data.num_days - (curr_time + library.signup_days)
-            max_books_scanned = time_left * library.books_per_day
-
-            available_books = sorted(
-                {book.id for book in library.books} - new_scanned_books,
-                key=lambda b: -data.scores[b]
-            )[:max_books_scanned]
-
-            if available_books:
-                new_signed_libraries.append(lib_id)
-                new_scanned_books_per_library[lib_id] = available_books
-                new_scanned_books.update(available_books)
-                curr_time += library.signup_days
-            else:
-                solution1.unsigned_libraries.append(lib_id)
-
-        solution1.signed_libraries = new_signed_libraries
-        solution1.scanned_books_per_library = new_scanned_books_per_library
-        solution1.scanned_books = new_scanned_books
-        solution1.calculate_fitness_score(data.scores)
-
-        # Process solution2
-        curr_time = 0
-        new_scanned_books = set()
-        new_scanned_books_per_library = {}
-        new_signed_libraries = []
-
-        for lib_id in solution2.signed_libraries:
-            library = data.libs[lib_id]
-
-            # Check if there's enough time for signup and at least one day of scanning
-            if curr_time + library.signup_days >= data.num_days - 1:
-                solution2.unsigned_libraries.append(lib_id)
-                continue
-
-            time_left = data.num_days - (curr_time + library.signup_days)
-            max_books_scanned = time_left * library.books_per_day
-
-            available_books = sorted(
-                {book.id for book in library.books} - new_scanned_books,
-                key=lambda b: -data.scores[b]
-            )[:max_books_scanned]
-
-            if available_books:
-                new_signed_libraries.append(lib_id)
-                new_scanned_books_per_library[lib_id] = available_books
-                new_scanned_books.update(available_books)
-                curr_time += library.signup_days
-            else:
-                solution2.unsigned_libraries.append(lib_id)
-
-        solution2.signed_libraries = new_signed_libraries
-        solution2.scanned_books_per_library = new_scanned_books_per_library
-        solution2.scanned_books = new_scanned_books
-        solution2.calculate_fitness_score(data.scores)
-
         # Return the better solution
         return solution1 if solution1.fitness_score > solution2.fitness_score else solution2
 
@@ -439,159 +254,36 @@ class Tweaks:
         rest = [lib for lib in parent2.signed_libraries if lib not in inherited]
         combined = inherited + rest
 
-        child = Solution(
-            signed_libs=combined,
-            unsigned_libs=[],
-            scanned_books_per_library={},
-            scanned_books=set()
-        )
-
         # Rebuild the solution to ensure it's valid
-        curr_time = 0
-        new_scanned_books = set()
-        new_scanned_books_per_library = []
-        new_signed_libraries = []
-        new_scanned_books_per_library = {}
-
-        for lib_id in combined:
-            library = data.libs[lib_id]
-
-            if curr_time + library.signup_days >= data.num_days - 1:
-                child.unsigned_libraries.append(lib_id)
-                continue
-
-            time_left = data.num_days - (curr_time + library.signup_days)
-            max_books_scanned = time_left * library.books_per_day
-
-            available_books = sorted(
-                {book.id for book in library.books} - new_scanned_books,
-                key=lambda b: -data.scores[b]
-            )[:max_books_scanned]
-
-            if available_books:
-                new_signed_libraries.append(lib_id)
-                new_scanned_books_per_library[lib_id] = available_books
-                new_scanned_books.update(available_books)
-                curr_time += library.signup_days
-            else:
-                child.unsigned_libraries.append(lib_id)
-
-        child.signed_libraries = new_signed_libraries
-        child.scanned_books_per_library = new_scanned_books_per_library
-        child.scanned_books = new_scanned_books
-        child.calculate_fitness_score(data.scores)
-
-        return child
+        return Decoder.for_instance(data).decode(combined, [])
 
     @staticmethod
     def tweak_solution_swap_neighbor_libraries(solution, data):
         if len(solution.signed_libraries) < 2:
             return solution
 
-        # Create a copy of the solution
-        new_solution = Solution(
-            solution.signed_libraries.copy(),
-            solution.unsigned_libraries.copy(),
-            solution.scanned_books_per_library.copy(),
-            solution.scanned_books.copy()
-        )
+        signed_libraries = solution.signed_libraries.copy()
 
         # Select a random position and its neighbor
-        pos = random.randint(0, len(new_solution.signed_libraries) - 2)
-        new_solution.signed_libraries[pos], new_solution.signed_libraries[pos + 1] = \
-            new_solution.signed_libraries[pos + 1], new_solution.signed_libraries[pos]
-
-        # Rebuild the solution
-        curr_time = 0
-        new_scanned_books = set()
-        new_scanned_books_per_library = {}
-        new_signed_libraries = []
-
-        for lib_id in new_solution.signed_libraries:
-            library = data.libs[lib_id]
-
-            # Check if there's enough time for signup and at least one day of scanning
-            if curr_time + library.signup_days >= data.num_days - 1:
-                new_solution.unsigned_libraries.append(lib_id)
-                continue
-
-            time_left = data.num_days - (curr_time + library.signup_days)
-            max_books_scanned = time_left * library.books_per_day
-
-            available_books = sorted(
-                {book.id for book in library.books} - new_scanned_books,
-                key=lambda b: -data.scores[b]
-            )[:max_books_scanned]
-
-            if available_books:
-                new_signed_libraries.append(lib_id)
-                new_scanned_books_per_library[lib_id] = available_books
-                new_scanned_books.update(available_books)
-                curr_time += library.signup_days
-            else:
-                new_solution.unsigned_libraries.append(lib_id)
-
-        new_solution.signed_libraries = new_signed_libraries
-        new_solution.scanned_books_per_library = new_scanned_books_per_library
-        new_solution.scanned_books = new_scanned_books
-        new_solution.calculate_fitness_score(data.scores)
+        pos = random.randint(0, len(signed_libraries) - 2)
+        signed_libraries[pos], signed_libraries[pos + 1] = signed_libraries[pos + 1], signed_libraries[pos]
 
-        return new_solution
+        return Decoder.for_instance(data).decode_from(solution, signed_libraries, pos, solution.unsigned_libraries)
 
     @staticmethod
     def tweak_solution_insert_library(solution, data):
         if not solution.unsigned_libraries:
             return solution
 
-        # Create a copy of the solution
-        new_solution = Solution(
-            solution.signed_libraries.copy(),
-            solution.unsigned_libraries.copy(),
-            solution.scanned_books_per_library.copy(),
-            solution.scanned_books.copy()
-        )
+        signed_libraries = solution.signed_libraries.copy()
+        unsigned_libraries = solution.unsigned_libraries.copy()
 
         # Select a random unsigned library
-        unsigned_idx = random.randint(0, len(new_solution.unsigned_libraries) - 1)
-        new_lib_id = new_solution.unsigned_libraries.pop(unsigned_idx)
+        unsigned_idx = random.randint(0, len(unsigned_libraries) - 1)
+        new_lib_id = unsigned_libraries.pop(unsigned_idx)
 
         # Select a random position to insert
-        insert_pos = random.randint(0, len(new_solution.signed_libraries))
-        new_solution.signed_libraries.insert(insert_pos, new_lib_id)
-
-        # Rebuild the solution
-        curr_time = 0
-        new_scanned_books = set()
-        new_scanned_books_per_library = {}
-        new_signed_libraries = []
-
-        for lib_id in new_solution.signed_libraries:
-            library = data.libs[lib_id]
-
-            # Check if there's enough time for signup and at least one day of scanning
-            if curr_time + library.signup_days >= data.num_days - 1:
-                new_solution.unsigned_libraries.append(lib_id)
-                continue
-
-            time_left = data.num_days - (curr_time + library.signup_days)
-            max_books_scanned = time_left * library.books_per_day
-
-            available_books = sorted(
-                {book.id for book in library.books} - new_scanned_books,
-                key=lambda b: -data.scores[b]
-            )[:max_books_scanned]
-
-            if available_books:
-                new_signed_libraries.append(lib_id)
-                new_scanned_books_per_library[lib_id] = available_books
-                new_scanned_books.update(available_books)
-                curr_time += library.signup_days
-            else:
-                new_solution.unsigned_libraries.append(lib_id)
-
-        new_solution.signed_libraries = new_signed_libraries
-        new_solution.scanned_books_per_library = new_scanned_books_per_library
-        new_solution.scanned_books = new_scanned_books
-        new_solution.calculate_fitness_score(data.scores)
+        insert_pos = random.randint(0, len(signed_libraries))
+        signed_libraries.insert(insert_pos, new_lib_id)
 
-        return new_solution
\ No newline at end of file
+        return Decoder.for_instance(data).decode_from(solution, signed_libraries, insert_pos, unsigned_libraries)
\ No newline at end of file
@@ -0,0 +1,160 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from models.compact_solution import CompactSolution
+from models.shared_instance import SharedInstance
+
+
+class WeightedEfficiencyTuner:
+    """
+    Searches the (alpha, beta) parameters of
+    `InitialSolution.generate_initial_solution_weighted_efficiency` within a time limit,
+    coarse to fine:
+    - the coarse grid `InitialSolution.WEIGHTED_EFFICIENCY_ALPHAS` x `..._BETAS` first
+    - then a pattern search around the best point so far: its 8 neighbours at the
+      current step sizes are evaluated; if one of them is better the search moves
+      there with the same steps (which widens the grid past its edges), otherwise the
+      steps are halved
+
+    A round of neighbours only starts if one evaluation, timed on the coarse grid, still
+    fits in the time left. With `workers > 0` the points of a round are evaluated
+    concurrently by worker processes attached to the instance through `SharedInstance`;
+    with `workers=0` they run in this process. At the time limit the points not started
+    yet are cancelled and the tuner waits for the running ones, at most one evaluation
+    past the limit.
+
+    After `run`, `results` maps every evaluated (alpha, beta) to its score.
+    """
+    # Starting steps of the pattern search, the spacing of the coarse grid
+    ALPHA_STEP = 0.5
+    BETA_STEP = 0.05
+    # The search stops once the steps are below these
+    MIN_ALPHA_STEP = 0.01
+    MIN_BETA_STEP = 0.001
+
+    # Instance of the worker process, see `init_worker`
+    _worker_instance = None
+
+    def __init__(self, data, time_limit=60, workers=0):
+        self.data = data
+        self.time_limit = time_limit
+        self.workers = workers
+        self.results = {}
+        self.best = None
+        self.best_solution = None
+        # Points evaluated or submitted so far, orders the points with equal scores
+        self.submitted = 0
+        # Longest evaluation so far, in seconds
+        self.evaluation_sec = 0.0
+        self.deadline = None
+        self.shared = None
+        self.executor = None
+
+    def run(self):
+        """Returns (best_alpha, best_beta, best_score, best_solution), like `tune_weighted_efficiency_parameters`."""
+        # Imported here, `InitialSolution` creates the tuner
+        from models.initial_solution import InitialSolution
+
+        self.deadline = time.time() + self.time_limit
+        if self.workers > 0:
+            self.shared = SharedInstance.publish(self.data)
+            self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                initializer=WeightedEfficiencyTuner.init_worker,
+                                                initargs=(self.shared.handle,))
+        try:
+            self.evaluate([(alpha, beta) for alpha in InitialSolution.WEIGHTED_EFFICIENCY_ALPHAS
+                           for beta in InitialSolution.WEIGHTED_EFFICIENCY_BETAS])
+            self.refine()
+        finally:
+            self.close()
+
+        if self.best is None:
+            return 1.0, 0.1, 0, None
+        (alpha, beta), score, _ = self.best
+        return alpha, beta, score, self.best_solution
+
+    def refine(self):
+        alpha_step = WeightedEfficiencyTuner.ALPHA_STEP
+        beta_step = WeightedEfficiencyTuner.BETA_STEP
+        while self.best is not None and alpha_step >= WeightedEfficiencyTuner.MIN_ALPHA_STEP \
+                and beta_step >= WeightedEfficiencyTuner.MIN_BETA_STEP:
+            if time.time() + self.evaluation_sec > self.deadline:
+                return
+            (alpha, beta), _, _ = self.best
+            neighbours = [
+                (round(alpha + i * alpha_step, 6), round(beta + j * beta_step, 6))
+                for i in (-1, 0, 1) for j in (-1, 0, 1) if i or j
+            ]
+            # Only non-negative parameters, a negative beta rewards signing more libraries
+            points = [point for point in neighbours if min(point) >= 0 and point not in self.results]
+            if not self.evaluate(points):
+                alpha_step /= 2
+                beta_step /= 2
+
+    def evaluate(self, points):
+        """Evaluates `points` until the deadline, returns whether the best point changed."""
+        best = self.best
+        if self.executor is None:
+            for alpha, beta in points:
+                if time.time() >= self.deadline:
+                    break
+                self.record(self.next_order(), *WeightedEfficiencyTuner.run_point(self.data, alpha, beta))
+            return self.best is not best
+
+        orders = {}
+        for alpha, beta in points:
+            orders[self.executor.submit(WeightedEfficiencyTuner.run_worker_point, alpha, beta)] = self.next_order()
+        pending = set(orders)
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, self.deadline - time.time()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                for future in pending:
+                    future.cancel()
+                break
+            for future in done:
+                alpha, beta, solution, seconds = future.result()
+                self.record(orders[future], alpha, beta, solution.to_solution(), seconds)
+        return self.best is not best
+
+    def next_order(self):
+        self.submitted += 1
+        return self.submitted
+
+    def record(self, order, alpha, beta, solution, seconds):
+        score = solution.fitness_score
+        self.results[(alpha, beta)] = score
+        self.evaluation_sec = max(self.evaluation_sec, seconds)
+        # Ties go to the point submitted first, like in the sequential grid, whichever
+        # worker finishes first
+        if self.best is None or (score, -order) > (self.best[1], -self.best[2]):
+            self.best = ((alpha, beta), score, order)
+            self.best_solution = solution
+
+    def close(self):
+        if self.executor is not None:
+            # Cancels the points not started yet and waits for the running ones, so no
+            # evaluation keeps a core busy after the tuner returns
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        if self.shared is not None:
+            self.shared.unlink()
+            self.shared = None
+
+    @staticmethod
+    def run_point(data, alpha, beta):
+        from models.initial_solution import InitialSolution
+
+        start = time.time()
+        solution = InitialSolution.generate_initial_solution_weighted_efficiency(data, alpha=alpha, beta=beta)
+        return alpha, beta, solution, time.time() - start
+
+    @staticmethod
+    def init_worker(instance_handle):
+        WeightedEfficiencyTuner._worker_instance = SharedInstance.attach(instance_handle)
+
+    @staticmethod
+    def run_worker_point(alpha, beta):
+        instance = WeightedEfficiencyTuner._worker_instance
+        alpha, beta, solution, seconds = WeightedEfficiencyTuner.run_point(instance, alpha, beta)
+        return alpha, beta, CompactSolution.from_solution(solution, instance.num_books), seconds
@@ -1,35 +1,71 @@
 import glob
 import os
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-from models import Parser
+from models import InstanceCache
 from models.initial_solution import InitialSolution
 from models.genetic_solver import GeneticSolver
+from models.shared_instance import SharedInstance
 
 INPUT_INSTANCES_DIR = 'input'
 OUTPUT_INSTANCES_DIR = 'output'
+# Snapshots of unfinished runs; with RESUME a rerun of the same version continues them
+CHECKPOINTS_DIR = 'checkpoints'
+CHECKPOINT_INTERVAL_SEC = 60
+RESUME = False
+# Best-so-far solutions are written to the output file while the GA runs, and their
+# (elapsed seconds, score) to a trace file here
+TRACES_DIR = 'traces'
+STREAM_INTERVAL_SEC = 5
+# Pick tweaks by their recent fitness gain per CPU-second instead of the fixed
+# `Tweaks.WEIGHTS`, see `OperatorScheduler`; off so runs compare with earlier versions
+ADAPTIVE_TWEAKS = False
 
 MINUTES_TO_RUN = 10
 MAX_ITERATIONS = 1000
 NUM_CORES = 50
+NUM_VERSIONS = 5
 
 
-def run_solver(version: str, instance_path: str) -> None:
+def run_solver(version: str, instance_path: str, instance_handle=None) -> None:
+    if instance_handle is None:
+        solve_instance(version, instance_path, InstanceCache(instance_path).load())
+        return
+
+    solve_instance(version, instance_path, SharedInstance.attach(instance_handle))
+    # Pool workers run many jobs, only keep the instance of the current one mapped
+    SharedInstance.detach(instance_handle)
+
+
+def solve_instance(version: str, instance_path: str, instance) -> None:
     output_sub_dir = os.path.join(OUTPUT_INSTANCES_DIR, version)
     os.makedirs(output_sub_dir, exist_ok=True)
+    instance_name = os.path.basename(instance_path)
+    output_file = os.path.join(output_sub_dir, instance_name)
 
-    parser = Parser(instance_path)
-    instance = parser.parse()
-    initial_solution = InitialSolution.generate_initial_solution(instance)
-    genetic_solver = GeneticSolver(initial_solution=initial_solution, 
+    genetic_solver = GeneticSolver(initial_solution=None,
                                     instance=instance,
-                                    time_limit_sec=MINUTES_TO_RUN * 60)
+                                    time_limit_sec=MINUTES_TO_RUN * 60,
+                                    checkpoint_path=os.path.join(CHECKPOINTS_DIR, version,
+                                                                 f'{os.path.basename(instance_path)}.pkl'),
+                                    checkpoint_interval_sec=CHECKPOINT_INTERVAL_SEC,
+                                    resume=RESUME,
+                                    output_path=output_file,
+                                    trace_path=os.path.join(TRACES_DIR, version, f'{instance_name}.csv'),
+                                    stream_interval_sec=STREAM_INTERVAL_SEC,
+                                    adaptive_tweaks=ADAPTIVE_TWEAKS)
+    # A resumed run takes its population from the snapshot and needs no initial solution
+    if genetic_solver.load_checkpoint() is None:
+        genetic_solver.initial_solution = InitialSolution.generate_initial_solution(instance)
     solution = genetic_solver.solve()
     score = solution.fitness_score
 
-    instance_name = os.path.basename(instance_path)
     print(instance_name, score, f'version: {version}')
-    output_file = os.path.join(output_sub_dir, instance_name)
+    if genetic_solver.fitness_cache is not None:
+        print(instance_name, f'fitness cache {genetic_solver.fitness_cache}')
+    print(instance_name, f'upper bound {genetic_solver.upper_bound}, gap {genetic_solver.gap:.4%}')
+    if genetic_solver.operator_scheduler is not None:
+        print(genetic_solver.operator_scheduler)
     solution.export(output_file)
 
 
@@ -37,16 +73,30 @@ def main():
     instance_paths = glob.glob(f'{INPUT_INSTANCES_DIR}/*.txt')
     jobs = []
 
-    for v in range(1, 6):
+    for v in range(1, NUM_VERSIONS + 1):
         version = f'v{v}'
         for path in instance_paths:
             jobs.append((version, path))
 
-    with ProcessPoolExecutor(max_workers=NUM_CORES) as executor:
-        futures = [executor.submit(run_solver, version, path) for version, path in jobs]
+    # Parse every instance once and let all of its versions attach to the same copy
+    shared = {path: SharedInstance.publish(InstanceCache(path).load()) for path in instance_paths}
+    remaining = {path: NUM_VERSIONS for path in instance_paths}
+
+    try:
+        with ProcessPoolExecutor(max_workers=NUM_CORES) as executor:
+            futures = {executor.submit(run_solver, version, path, shared[path].handle): path
+                       for version, path in jobs}
+
+            for future in as_completed(futures):
+                future.result()
 
-        for future in futures:
-            future.result()  
+                path = futures[future]
+                remaining[path] -= 1
+                if remaining[path] == 0:
+                    shared.pop(path).unlink()
+    finally:
+        for instance in shared.values():
+            instance.unlink()
 
 
 if __name__ == '__main__':
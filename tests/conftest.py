@@ -0,0 +1,22 @@
+import random
+
+import pytest
+
+from models.parser import Parser
+
+
+def write_instance(path, num_books=60, num_libs=12, num_days=30, seed=0, max_library_books=12):
+    """Writes a random instance in the input file format and returns its path."""
+    rng = random.Random(seed)
+    lines = [f'{num_books} {num_libs} {num_days}', ' '.join(str(rng.randint(1, 100)) for _ in range(num_books))]
+    for _ in range(num_libs):
+        books = rng.sample(range(num_books), rng.randint(3, max_library_books))
+        lines.append(f'{len(books)} {rng.randint(1, 5)} {rng.randint(1, 3)}')
+        lines.append(' '.join(map(str, books)))
+    path.write_text('\n'.join(lines) + '\n')
+    return path
+
+
+@pytest.fixture
+def instance(tmp_path):
+    return Parser(str(write_instance(tmp_path / 'instance.txt'))).parse()
@@ -0,0 +1,37 @@
+import random
+
+import numpy as np
+
+from models.batch_decoder import BatchDecoder
+from models.decoder import Decoder
+
+
+def test_evaluate_matches_decode(instance):
+    decoder = Decoder.for_instance(instance)
+    rng = random.Random(0)
+    orders = []
+    for _ in range(20):
+        order = list(range(instance.num_libs))
+        rng.shuffle(order)
+        orders.append(order[:rng.randint(1, instance.num_libs)])
+    padded = np.full((len(orders), instance.num_libs), -1)
+    for row, order in enumerate(orders):
+        padded[row, :len(order)] = order
+
+    scores, signed_counts = BatchDecoder(instance).evaluate(padded)
+
+    for order, score, signed_count in zip(orders, scores, signed_counts):
+        solution = decoder.decode(order, [])
+        assert score == solution.fitness_score
+        assert signed_count == len(solution.signed_libraries)
+
+
+def test_evaluate_splits_large_batches(instance, monkeypatch):
+    orders = np.array([random.Random(seed).sample(range(instance.num_libs), instance.num_libs) for seed in range(10)])
+    expected = BatchDecoder(instance).evaluate(orders)
+
+    # Three individuals per chunk
+    monkeypatch.setattr(BatchDecoder, 'MAX_MASK_BYTES', 3 * instance.num_books)
+    scores, signed_counts = BatchDecoder(instance).evaluate(orders)
+
+    assert np.array_equal(scores, expected[0]) and np.array_equal(signed_counts, expected[1])
@@ -0,0 +1,12 @@
+import pytest
+
+from models.decoder import Decoder
+
+
+def test_decode_rejects_a_repeated_library(instance):
+    decoder = Decoder.for_instance(instance)
+    order = list(range(instance.num_libs))
+    signed = decoder.decode(order, []).signed_libraries
+
+    with pytest.raises(ValueError):
+        decoder.decode(order + [signed[0]], [])
@@ -0,0 +1,24 @@
+import random
+
+from models.genetic_solver import GeneticSolver
+
+
+def test_crossover_places_every_library_once(instance, monkeypatch):
+    solver = GeneticSolver(None, instance, fitness_cache_size=0)
+    random.seed(0)
+    libraries = list(range(instance.num_libs))
+    parents = [(solver.decoder.decode(random.sample(libraries, len(libraries)), []),
+                solver.decoder.decode(random.sample(libraries, len(libraries) // 3), []))
+               for _ in range(50)]
+
+    # The decoder skips repeated libraries, so check the orders crossover hands to it
+    orders = []
+    decode = solver.decoder.decode
+    monkeypatch.setattr(solver.decoder, 'decode', lambda order, *args: orders.append(list(order)) or decode(order, *args))
+    for parent1, parent2 in parents:
+        # Parents that share only part of their libraries make the fill-up fall back to parent1
+        solver.crossover(parent1, parent2)
+
+    assert orders
+    for order in orders:
+        assert len(order) == len(set(order))
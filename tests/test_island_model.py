@@ -0,0 +1,42 @@
+import pytest
+
+from conftest import write_instance
+from models.decoder import Decoder
+from models.initial_solution import InitialSolution
+from models.island_model import IslandModel
+from models.parser import Parser
+
+
+def test_islands_finish_while_migrants_are_in_flight(tmp_path):
+    # Large migrant batches every generation, so islands finish while batches are still
+    # being written to their neighbours' inboxes
+    instance = Parser(str(write_instance(tmp_path / 'instance.txt', num_books=20000, num_libs=200,
+                                         num_days=400, seed=3, max_library_books=2000))).parse()
+    initial_solution = InitialSolution.generate_initial_solution_sorted(instance)
+
+    for seed in range(3):
+        islands = IslandModel(initial_solution, instance, num_islands=3, topology='fully_connected',
+                              migration_interval=1, num_migrants=20, time_limit_sec=2, seed=seed,
+                              population_size=30, stop_gap=None)
+        solution = islands.solve()
+        assert solution.fitness_score == max(islands.island_scores)
+
+
+def test_islands_reject_worker_processes(instance):
+    initial_solution = InitialSolution.generate_initial_solution_sorted(instance)
+
+    with pytest.raises(ValueError):
+        IslandModel(initial_solution, instance, offspring_workers=2)
+    with pytest.raises(ValueError):
+        IslandModel(initial_solution, instance, island_params=[{}, {'immigrant_worker': True}])
+
+
+def test_islands_start_from_the_seed_solutions(instance):
+    # A poor initial solution, only the seed gets the islands to the greedy score
+    initial_solution = Decoder.for_instance(instance).decode([0], list(range(1, instance.num_libs)))
+    seed_solution = InitialSolution.generate_initial_greedy_heap(instance)
+
+    islands = IslandModel(initial_solution, instance, num_islands=2, time_limit_sec=1, seed=0,
+                          seed_solutions=[seed_solution], population_size=10, generations=1)
+
+    assert islands.solve().fitness_score >= seed_solution.fitness_score
@@ -0,0 +1,31 @@
+import random
+
+from models.decoder import Decoder
+from models.offspring_pool import OffspringPool
+from models.operator_scheduler import OperatorScheduler
+from models.tweaks import Tweaks
+
+
+def create_offspring(instance, workers, parent_pairs, seed):
+    pool = OffspringPool(instance, workers, mutation_prob=1.0, tweak_steps=5, batch_size=2)
+    # Set like `GeneticSolver.solve` does, after the pool exists but before its workers start
+    Tweaks.scheduler = OperatorScheduler(Tweaks.get_tweak_methods_by_name(), Tweaks.WEIGHTS)
+    try:
+        random.seed(seed)
+        offspring = pool.create(parent_pairs)
+    finally:
+        Tweaks.scheduler = None
+        pool.close()
+    return [(list(solution.signed), solution.scanned_books_per_library, solution.fitness_score)
+            for solution in offspring]
+
+
+def test_offspring_do_not_depend_on_the_number_of_workers(instance):
+    decoder = Decoder.for_instance(instance)
+    rng = random.Random(1)
+    libraries = list(range(instance.num_libs))
+    parent_pairs = [(decoder.decode(rng.sample(libraries, len(libraries)), []),
+                     decoder.decode(rng.sample(libraries, len(libraries)), []))
+                    for _ in range(8)]
+
+    assert create_offspring(instance, 1, parent_pairs, seed=7) == create_offspring(instance, 2, parent_pairs, seed=7)
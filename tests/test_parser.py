@@ -0,0 +1,10 @@
+from conftest import write_instance
+from models.parser import Parser
+
+
+def test_every_parse_numbers_libraries_from_zero(tmp_path):
+    first = Parser(str(write_instance(tmp_path / 'first.txt', seed=1))).parse()
+    second = Parser(str(write_instance(tmp_path / 'second.txt', num_libs=5, seed=2))).parse()
+
+    assert [lib.id for lib in first.libs] == list(range(first.num_libs))
+    assert [lib.id for lib in second.libs] == list(range(second.num_libs))
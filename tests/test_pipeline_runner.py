@@ -0,0 +1,28 @@
+import time
+
+from models.genetic_solver import GeneticSolver
+from models.initial_solution import InitialSolution
+
+
+def test_resumed_run_continues_the_trace(instance, tmp_path):
+    trace_path = tmp_path / 'trace.csv'
+    initial_solution = InitialSolution.generate_initial_solution_sorted(instance)
+    params = {'population_size': 10, 'stop_gap': None, 'trace_path': str(trace_path)}
+
+    first = GeneticSolver(initial_solution, instance, generations=3, keep_final_state=True, **params)
+    first.solve()
+    first_trace = trace_path.read_text().splitlines()
+
+    GeneticSolver(initial_solution, instance, generations=6, resume_from=first.final_state, **params).solve()
+    trace = trace_path.read_text().splitlines()
+    assert trace[:len(first_trace)] == first_trace
+    assert trace.count('elapsed_sec,score') == 1
+
+
+def test_no_generation_starts_after_the_deadline(instance):
+    solver = GeneticSolver(InitialSolution.generate_initial_solution_sorted(instance), instance,
+                           population_size=10, stop_gap=None)
+    solution = solver.solve(deadline=time.time())
+
+    assert solver.diversity_history == []
+    assert solution.fitness_score >= solver.initial_solution.fitness_score
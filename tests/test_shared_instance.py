@@ -0,0 +1,30 @@
+import weakref
+
+import numpy as np
+
+from models.genetic_solver import GeneticSolver
+from models.initial_solution import InitialSolution
+from models.instance_data import InstanceData
+from models.shared_instance import SharedInstance
+
+
+def solve(instance):
+    initial_solution = InitialSolution.generate_initial_solution_sorted(instance)
+    return GeneticSolver(initial_solution, instance, population_size=10, generations=3, stop_gap=None).solve()
+
+
+def test_attached_instance_matches_and_detaches(instance):
+    shared = SharedInstance.publish(instance)
+    try:
+        attached = SharedInstance.attach(shared.handle)
+        for name in InstanceData.ARRAYS:
+            assert np.array_equal(getattr(attached, name), getattr(instance, name))
+        assert solve(attached).fitness_score > 0
+        assert attached.libs[0].books
+        attached = weakref.ref(attached)
+
+        SharedInstance.detach(shared.handle)
+        assert attached() is None
+        assert shared.handle[0] not in SharedInstance._attached
+    finally:
+        shared.unlink()
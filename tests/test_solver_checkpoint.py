@@ -0,0 +1,49 @@
+import os
+
+from models.genetic_solver import GeneticSolver
+from models.initial_solution import InitialSolution
+from models.solver_checkpoint import SolverCheckpoint
+
+
+def make_solver(instance, checkpoint_path, initial_solution=True, **params):
+    params = {'population_size': 10, 'generations': 5, 'stop_gap': None, 'fitness_cache_size': 0,
+              'checkpoint_path': str(checkpoint_path), **params}
+    initial_solution = InitialSolution.generate_initial_solution_sorted(instance) if initial_solution else None
+    return GeneticSolver(initial_solution, instance, **params)
+
+
+def interrupted_run(instance, checkpoint_path, **params):
+    """Leaves the snapshot an interrupted run with `params` would have left, returns its solver."""
+    solver = make_solver(instance, None, keep_final_state=True, **params)
+    solver.solve()
+    SolverCheckpoint(str(checkpoint_path)).save(instance, solver.checkpoint_config, *solver.final_state)
+    return solver
+
+
+def test_finished_run_removes_its_snapshot(instance, tmp_path):
+    checkpoint_path = tmp_path / 'run.pkl'
+    make_solver(instance, checkpoint_path, checkpoint_interval_sec=0).solve()
+    assert not os.path.exists(checkpoint_path)
+
+
+def test_snapshot_is_resumed_only_on_request_and_with_the_same_config(instance, tmp_path):
+    checkpoint_path = tmp_path / 'run.pkl'
+    interrupted_run(instance, checkpoint_path)
+
+    assert make_solver(instance, checkpoint_path).load_checkpoint() is None
+    assert make_solver(instance, checkpoint_path, resume=True, population_size=12).load_checkpoint() is None
+    assert make_solver(instance, checkpoint_path, resume=True, mutation_prob=0.5).load_checkpoint() is None
+    assert make_solver(instance, checkpoint_path, resume=True).load_checkpoint() is not None
+
+
+def test_resumed_run_keeps_the_operator_statistics(instance, tmp_path):
+    checkpoint_path = tmp_path / 'run.pkl'
+    first = interrupted_run(instance, checkpoint_path, adaptive_tweaks=True, mutation_prob=1.0)
+    assert sum(first.operator_scheduler.calls) > 0
+
+    # All generations are done, so the resumed run only restores the snapshot
+    resumed = make_solver(instance, checkpoint_path, initial_solution=False, adaptive_tweaks=True,
+                          mutation_prob=1.0, resume=True)
+    resumed.solve()
+    assert resumed.operator_scheduler.stats() == first.operator_scheduler.stats()
+    assert not os.path.exists(checkpoint_path)
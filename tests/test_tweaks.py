@@ -0,0 +1,49 @@
+import random
+
+from models.decoder import Decoder
+from models.moves import Moves
+from models.tweaks import Tweaks
+
+
+def decoded_solution(instance):
+    # A decoded library already scans its best free books, so there is nothing to gain
+    return Decoder.for_instance(instance).decode(list(range(instance.num_libs)), [])
+
+
+def test_swap_last_book_keeps_a_decoded_solution(instance):
+    solution = decoded_solution(instance)
+    random.seed(0)
+
+    for _ in range(20):
+        assert Tweaks.tweak_solution_swap_last_book(solution, instance) is solution
+        assert Moves.swap_last_book(solution, instance) is None
+    assert solution.checkpoints is not None
+
+
+def test_swap_last_book_move_keeps_the_checkpoints(instance, monkeypatch):
+    # `tweak_with_iterations` applies the tweak through `Moves.swap_last_book`
+    solution = decoded_solution(instance)
+    monkeypatch.setattr(Tweaks, 'scheduler', None)
+    monkeypatch.setattr(Tweaks, 'choose_tweak_method', lambda: Tweaks.tweak_solution_swap_last_book)
+    random.seed(0)
+
+    tweaked = Tweaks.tweak_with_iterations(solution, instance, iterations=20)
+
+    assert tweaked.fitness_score == solution.fitness_score
+    assert tweaked.checkpoints is not None
+
+
+def test_swap_last_book_takes_a_better_free_book(instance):
+    solution = decoded_solution(instance)
+    lib_id = next(lib_id for lib_id in solution.signed_libraries if solution.scanned_books_per_library[lib_id])
+    # Free the library's best book by giving it a worse one
+    best_book = solution.scanned_books_per_library[lib_id][0]
+    solution.signed_libraries = [lib_id]
+    solution.scanned_books_per_library = {lib_id: solution.scanned_books_per_library[lib_id][1:]}
+    solution.scanned_books = set(solution.scanned_books_per_library[lib_id])
+    solution.calculate_fitness_score(instance.scores)
+    fitness_score = solution.fitness_score
+
+    assert Moves.swap_last_book(solution, instance) is not None
+    assert best_book in solution.scanned_books
+    assert solution.fitness_score > fitness_score